@@ -7,8 +7,12 @@
 import json
 import re
 import copy
-from itertools import groupby
+import time
+import numpy as np
+from collections import OrderedDict
+from itertools import groupby, product, islice
 from utils import APPROACH, FOOT, SYL, VERBOSE, VERY_VERBOSE
+from stats import scanStats
 from ..shared import utils as generalUtils
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
@@ -18,17 +22,50 @@ from ..shared import utils as generalUtils
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
 
+# bits for the true/false information about a cv grouping or syllable, which
+# is stored in a single integer (flags) to keep the objects small.
+FLAG_VOWEL_SPACE_VOWEL = 1
+FLAG_WORD_END_VOWEL = 2
+FLAG_LAST_VOWEL_IN_WORD = 4
+FLAG_PAUSE_NEXT = 8
+FLAG_DOUBLE_CONSONANT_NEXT = 16
+FLAG_POSSIBLE_SHORT_Z_NEXT = 32
+FLAG_MUTE_LIQUID_NEXT = 64
+FLAG_MUTE_LIQUID_1_NEXT = 128
+FLAG_MUTE_LIQUID_2_NEXT = 256
+FLAG_CLOSED_BY_DIGAMMA = 512
+FLAG_HIATUS_BY_DIGAMMA = 1024
+FLAG_ICTUS_LENGTHENED = 2048
+FLAG_DOUBLE_VOWEL = 4096
+FLAG_SHARED = 8192
+
+# return a property that reads and writes the given bit of an object's flags
+# as True/False
+def flagProperty(bit):
+    def getFlag(self):
+        return (self.flags & bit) != 0
+    def setFlag(self, value):
+        if value:
+            self.flags |= bit
+        else:
+            self.flags &= ~bit
+    return property(getFlag, setFlag)
+
 # object containing a list of consonants followed by a
 # vowel sound, plus information about whether the set is followed by a
 # space (for word-end stuff) or a space and then a vowel (for correption)
-class CVObj:
+class CVObj(object):
+    __slots__ = ("consonants", "vowel", "flags")
+
+    vowelSpaceVowel = flagProperty(FLAG_VOWEL_SPACE_VOWEL)
+    wordEndVowel = flagProperty(FLAG_WORD_END_VOWEL)
+    lastVowelInWord = flagProperty(FLAG_LAST_VOWEL_IN_WORD)
+    pauseNext = flagProperty(FLAG_PAUSE_NEXT)
+
     def __init__(self):
         self.consonants = []
         self.vowel = ""
-        self.vowelSpaceVowel = False
-        self.wordEndVowel = False
-        self.lastVowelInWord = False
-        self.pauseNext = False
+        self.flags = 0
 
     def toString(self):
         s = "".join(self.consonants) + self.vowel
@@ -46,7 +83,45 @@ class CVObj:
 #     a space, and the next syllable starts with a vowel.
 # doubleConsonantNext is whether the next syllable starts with zeta, xi, psi
 # length is the length of this syllable
-class SyllableObj:
+# The true/false attributes are all stored as bits of flags. Syllables are
+# shared between the lists for different passes, so startConsonants is never
+# changed in place, and a syllable marked as shared must be copied (see
+# getWritableSyllable) before it is changed.
+class SyllableObj(object):
+    __slots__ = ("startConsonants", "vowel", "coreVowel", "vowelInherentLength",
+      "vowelAccent", "vowelBreathing", "endConsonant", "length", "flags")
+
+    # is this vowel at the end of a word (a in polem*a*)
+    wordEndVowel = flagProperty(FLAG_WORD_END_VOWEL)
+    # is this the last vowel in the word (second o in polem*o*n)
+    lastVowelInWord = flagProperty(FLAG_LAST_VOWEL_IN_WORD)
+    # is this the last vowel in the word and the next space counts as a
+    # pause, that is, the next word isn't an enclitic and this isn't a
+    # proclitic.
+    pauseNext = flagProperty(FLAG_PAUSE_NEXT)
+    # is this vowel followed by a space and then another vowel?
+    vowelSpaceVowel = flagProperty(FLAG_VOWEL_SPACE_VOWEL)
+    # are there multiple consonants at the start of the next syllable?
+    doubleConsonantNext = flagProperty(FLAG_DOUBLE_CONSONANT_NEXT)
+    # is this followed by a potentially short z?
+    possibleShortZNext = flagProperty(FLAG_POSSIBLE_SHORT_Z_NEXT)
+    # is there a mute followed by any liquid (r/l/m/n) after this vowel
+    muteLiquidNext = flagProperty(FLAG_MUTE_LIQUID_NEXT)
+    # is there a mute followed by a liquid (r/l) after this vowel
+    muteLiquid1Next = flagProperty(FLAG_MUTE_LIQUID_1_NEXT)
+    # is there a mute followed by a liquid (m/n) after this vowel
+    muteLiquid2Next = flagProperty(FLAG_MUTE_LIQUID_2_NEXT)
+    # would a digamma make this a closed syllable?
+    closedByDigamma = flagProperty(FLAG_CLOSED_BY_DIGAMMA)
+    # would a digamma cause hiatus in this syllable?
+    hiatusByDigamma = flagProperty(FLAG_HIATUS_BY_DIGAMMA)
+    # has this syllable been lengthened by ictus lengthening?
+    ictusLengthened = flagProperty(FLAG_ICTUS_LENGTHENED)
+    # does this syllable contain two vowels
+    doubleVowel = flagProperty(FLAG_DOUBLE_VOWEL)
+    # is this syllable shared by more than one list of syllables?
+    shared = flagProperty(FLAG_SHARED)
+
     def __init__(self):
         # the list of consonants at the start of this syllable
         self.startConsonants = []
@@ -62,36 +137,24 @@ class SyllableObj:
         self.vowelBreathing = ""
         # the consonant at the end of this syllable
         self.endConsonant = ""
-        # is this vowel at the end of a word (a in polem*a*)
-        self.wordEndVowel = False
-        # is this the last vowel in the word (second o in polem*o*n)
-        self.lastVowelInWord = False
-        # is this the last vowel in the word and the next space counts as a
-        # pause, that is, the next word isn't an enclitic and this isn't a
-        # proclitic.
-        self.pauseNext = False
-        # is this vowel followed by a space and then another vowel?
-        self.vowelSpaceVowel = False
-        # are there multiple consonants at the start of the next syllable?
-        self.doubleConsonantNext = False
-        # is this followed by a potentially short z?
-        self.possibleShortZNext = False
-        # is there a mute followed by any liquid (r/l/m/n) after this vowel
-        self.muteLiquidNext = False
-        # is there a mute followed by a liquid (r/l) after this vowel
-        self.muteLiquid1Next = False
-        # is there a mute followed by a liquid (m/n) after this vowel
-        self.muteLiquid2Next = False
-        # would a digamma make this a closed syllable?
-        self.closedByDigamma = False
-        # would a digamma cause hiatus in this syllable?
-        self.hiatusByDigamma = False
-        # has this syllable been lengthened by ictus lengthening?
-        self.ictusLengthened = False
         # what is the metrical length of this syllable
         self.length = SYL.UNKNOWN
-        # does this syllable contain two vowels
-        self.doubleVowel = False
+        # all of the true/false information, which starts out false
+        self.flags = 0
+
+    # return an unshared copy of this syllable
+    def copy(self):
+        syl = SyllableObj.__new__(SyllableObj)
+        syl.startConsonants = self.startConsonants
+        syl.vowel = self.vowel
+        syl.coreVowel = self.coreVowel
+        syl.vowelInherentLength = self.vowelInherentLength
+        syl.vowelAccent = self.vowelAccent
+        syl.vowelBreathing = self.vowelBreathing
+        syl.endConsonant = self.endConsonant
+        syl.length = self.length
+        syl.flags = self.flags & ~FLAG_SHARED
+        return syl
 
     def toString(self):
         s = "".join(self.startConsonants) + self.vowel + self.endConsonant
@@ -111,6 +174,16 @@ class SyllableObj:
             s += ""#"[NlastVowel]"#
         return s
 
+# return the syllable at index i of syllables so that it can be changed. If
+# the syllable is shared with other lists, it is replaced in this list by a
+# copy first.
+def getWritableSyllable(syllables, i):
+    syl = syllables[i]
+    if (syl.shared):
+        syl = syl.copy()
+        syllables[i] = syl
+    return syl
+
 # print a list of syllables
 def getSyllablesString(syllables):
     s = ""
@@ -362,12 +435,136 @@ def getStemForParse(parseData, entry):
 
     return (stem, stemVowelLengths)
 
-
+# placeholder for a parse field that is missing, so that a missing field and
+# one set to None get different keys
+MISSING_PARSE_FIELD = ("missing",)
+
+# the parse fields read by getStemForParse (other than the form, which is only
+# read when there is no tense)
+STEM_PARSE_FIELDS = ["lemma", "pos", "tense", "voice", "feature", "case", "number", "gender"]
+
+# the stem index for each lemma and the STEM_PARSE_FIELDS of a parse; cleared
+# by the phoneme cache when the dictionary changes
+stemIndexes = {}
+
+# given parse data and a dictionary entry for the associated lemma, get the
+# stems from getStemForParse as lists, along with an index of them by their
+# accentless form (without digammas): the sorted lengths of those forms, and
+# a dictionary from each form to the positions of the stems with that form.
+def getStemIndex(parseData, entry):
+    key = tuple(map(lambda f: parseData.get(f, MISSING_PARSE_FIELD), STEM_PARSE_FIELDS))
+    if not("tense" in parseData):
+        key += (parseData.get("form", MISSING_PARSE_FIELD),)
+    if not(key in stemIndexes):
+        (stem, stemVowelLengths) = getStemForParse(parseData, entry)
+        if (type(stem) != type([])):
+            stem = [stem]
+            stemVowelLengths = [stemVowelLengths]
+        stemPrefixes = {}
+        for i in range(len(stem)):
+            stemPrefixes.setdefault(stem[i].replace("v", ""), []).append(i)
+        stemLengths = sorted(set(map(len, stemPrefixes)))
+        stemIndexes[key] = (stem, stemVowelLengths, stemLengths, stemPrefixes)
+    return stemIndexes[key]
+
+# given an accentless token and a stem index from getStemIndex, return the
+# positions of the stems that start the token, in order
+def getMatchingStems(accentlessToken, stemLengths, stemPrefixes):
+    matches = []
+    for length in stemLengths:
+        if (length > len(accentlessToken)):
+            break
+        matches.extend(stemPrefixes.get(accentlessToken[:length], []))
+    matches.sort()
+    return matches
 
 keepNonDiphthongsRegex = re.compile('(a|o|e|h|w)[/=+]([iu])')
 #ending = re.sub(keepNonDiphthongsRegex, r'\1\2+', ending)
+# the default length of each vowel
+PHONEME_VOWEL_LENGTHS = {
+    "a": generalUtils.VOWEL_LEN.UNKNOWN,
+    "i": generalUtils.VOWEL_LEN.UNKNOWN,
+    "u": generalUtils.VOWEL_LEN.UNKNOWN,
+    "e": generalUtils.VOWEL_LEN.SHORT,
+    "o": generalUtils.VOWEL_LEN.SHORT,
+    "h": generalUtils.VOWEL_LEN.LONG,
+    "w": generalUtils.VOWEL_LEN.LONG
+}
+# pairs of vowels that form a diphthong (which is long by default)
+PHONEME_DIPHTHONGS = set(["ai", "ei", "oi", "ui", "au", "ou", "eu", "hu", "wu"])
+# characters that start a new phoneme; any other character is a diacritic or
+# punctuation that stays attached to the phoneme before it
+PHONEME_LETTERS = set("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_")
+# characters the lexer doesn't handle, because splitStringIntoPhonemesByRegex
+# uses them as markers; strings containing them are split by that instead.
+PHONEME_UNSUPPORTED = set("[]!@")
+
+# split a betacode string into phonemes in a single pass, returning the list
+# of phonemes (which joined with "." give the string splitStringIntoPhonemes
+# returns) and, for each phoneme, the default length of its vowel (or None
+# if it has no vowel).
+# A letter starts a new phoneme, unless it is the second vowel of a
+# diphthong; a vowel followed by a diaeresis (+) can't end a diphthong, so
+# the diaeresis is replaced by a split before the vowel.
+def lexPhonemes(s):
+    if not(PHONEME_UNSUPPORTED.isdisjoint(s)):
+        phonemes = splitStringIntoPhonemesByRegex(s).split(".")
+        return phonemes, map(getPhonemeDefaultLength, phonemes)
+    if ("+" in s):
+        s = splitDiaereses(s)
+
+    phonemes = [""]
+    lengths = [None]
+    i = 0
+    n = len(s)
+    while i < n:
+        c = s[i]
+        if c in PHONEME_LETTERS:
+            # start a new phoneme, unless we just split
+            if not(phonemes[-1] == "" and len(phonemes) > 1):
+                phonemes.append("")
+                lengths.append(None)
+            if (c in PHONEME_VOWEL_LENGTHS):
+                if (i + 1 < n and (c + s[i+1]) in PHONEME_DIPHTHONGS):
+                    phonemes[-1] = c + s[i+1]
+                    lengths[-1] = generalUtils.VOWEL_LEN.LONG
+                    i += 2
+                    continue
+                lengths[-1] = PHONEME_VOWEL_LENGTHS[c]
+            phonemes[-1] = c
+        elif c == ".":
+            if not(phonemes[-1] == "" and len(phonemes) > 1):
+                phonemes.append("")
+                lengths.append(None)
+        else:
+            phonemes[-1] += c
+        i += 1
+    return phonemes, lengths
+
+# put a split before each vowel followed by a diaeresis and remove the
+# diaeresis, e.g. ei+/ (εΐ) to e.i/, so the two vowels are not a diphthong
+def splitDiaereses(s):
+    result = []
+    i = 0
+    n = len(s)
+    while i < n:
+        c = s[i]
+        if (c in PHONEME_VOWEL_LENGTHS and i + 1 < n and s[i+1] == "+"):
+            result.append(".")
+            result.append(c)
+            i += 2
+        else:
+            result.append(c)
+            i += 1
+    return "".join(result)
+
 # split a betacode string into a set of phonemes
 def splitStringIntoPhonemes(s):
+    return ".".join(lexPhonemes(s)[0])
+
+# split a betacode string into a set of phonemes with a series of regular
+# expressions; only used for strings the lexer doesn't handle.
+def splitStringIntoPhonemesByRegex(s):
     # if we have something like εΐ (ei+/), it is not a dipthong so split
     # the two vowels with a split symbol
     s = re.sub(r'([aeiouhw])\+', r'.\1', s)
@@ -384,27 +581,27 @@ def splitStringIntoPhonemes(s):
     s = re.sub(r'\.+', '.', s)
     return s
 
+# get the default length of the vowel in a phoneme, or None if it has none
+def getPhonemeDefaultLength(phoneme):
+    vowels = filter(lambda c: c in PHONEME_VOWEL_LENGTHS, phoneme)
+    if (len(vowels) == 0):
+        return None
+    # diphthongs are just set as long by default
+    if (re.search(r'[aeiouhw]{2}', phoneme) or "h" in vowels or "w" in vowels):
+        return generalUtils.VOWEL_LEN.LONG
+    elif ("e" in vowels or "o" in vowels):
+        return generalUtils.VOWEL_LEN.SHORT
+    else:
+        return generalUtils.VOWEL_LEN.UNKNOWN
+
 # given a list of phonemes, apply the default lengths to vowels
 def applyBasicLengthsToPhonemes(phonemeString):
-    resultVowels = []
-
-    phons = phonemeString.split(".")
-    for p in phons:
-        if not(re.search(r'[aeiouhw]', p) == None):
-            # diphthongs are just set as long by default
-            if not(re.search(r'([aeiouhw]{2})|[hw]', p) == None):
-                resultVowels.append(generalUtils.VOWEL_LEN.LONG)
-            elif not(re.search(r'[eo]', p) == None):
-                resultVowels.append(generalUtils.VOWEL_LEN.SHORT)
-            else:
-                resultVowels.append(generalUtils.VOWEL_LEN.UNKNOWN)
-    return resultVowels
+    lengths = map(getPhonemeDefaultLength, phonemeString.split("."))
+    return filter(lambda l: not(l == None), lengths)
 
 # get the default set of lengths for a string
 def getDefaultLengths(s):
-    phons = splitStringIntoPhonemes(s)
-    res = applyBasicLengthsToPhonemes(phons)
-    return res
+    return filter(lambda l: not(l == None), lexPhonemes(s)[1])
 
 # check whether this only has e/o/h/w + dipthongs (in which case we don't need
 # to check for inherent lengths)
@@ -416,9 +613,26 @@ def allKnownVowels(ending):
         return False
     return True
 
+# the parse fields read by the functions in generalUtils.ENDING_DIVISIONS
+ENDING_PARSE_FIELDS = ["lemma", "pos", "gender", "case", "tense"]
+
+# the ending divisions computed so far, by endingType, ending, and the
+# ENDING_PARSE_FIELDS of the parse
+endingDivisions = {}
+
 # given an ending type, part of speech, an ending, and the associated parse
-# data, return the proper phonetic division (with lengths) for that ending
+# data, return the proper phonetic division (with lengths) for that ending.
+# The division only depends on the ending type, the ending and a few parse
+# fields, so it is computed once for each and kept in endingDivisions.
 def getEndingDivision(endingType, pos, ending, parseData):
+    key = (endingType, ending) + tuple(map(lambda f: parseData.get(f, MISSING_PARSE_FIELD), ENDING_PARSE_FIELDS))
+    if not(key in endingDivisions):
+        endingDivisions[key] = computeEndingDivision(endingType, pos, ending, parseData)
+    success, res, newEnding = endingDivisions[key]
+    return success, list(res), newEnding
+
+# compute the result of getEndingDivision
+def computeEndingDivision(endingType, pos, ending, parseData):
     newEnding = ending
     if (len(ending) > 0 and ending[0] == "+"):
         return False, [], ending #TODO: always false if no match?
@@ -457,54 +671,50 @@ def getFormVowelLengths(token, parseData, dictionary):
         #print "-------------"
 
         accentlessToken = re.sub(accentReplaceRegex, "", token)
-        (stem, stemVowelLengths) = getStemForParse(parseData, entry)
+        (stem, stemVowelLengths, stemLengths, stemPrefixes) = getStemIndex(parseData, entry)
 
         defaultLens = getDefaultLengths(token)
 
-        if (type(stem) != type([])):
-            stem = [stem]
-            stemVowelLengths = [stemVowelLengths]
-
         oneWorked = False
         newToken = token
-        for i in range(len(stem)):
+        for i in getMatchingStems(accentlessToken, stemLengths, stemPrefixes):
             if VERBOSE:
                 print entry
             myStem = stem[i]
             checkStem = myStem.replace("v", "")
-            if (accentlessToken.find(checkStem) == 0):
-                ending = accentlessToken.replace(checkStem, "", 1)
-                #print checkStem
-                #print accentlessToken
-                #print stem + " - " + ending
+            # the stems are found in the index, so checkStem starts accentlessToken
+            ending = accentlessToken[len(checkStem):]
+            #print checkStem
+            #print accentlessToken
+            #print stem + " - " + ending
 
-                if (token.find(myStem) == 0):
-                    ending = token.replace(checkStem, "", 1)
-                    ending = re.sub(keepNonDiphthongsRegex, r'\1\2+', ending)
-                    ending = re.sub(accentReplaceRegex, "", ending)
+            if (token.find(myStem) == 0):
+                ending = token.replace(checkStem, "", 1)
+                ending = re.sub(keepNonDiphthongsRegex, r'\1\2+', ending)
+                ending = re.sub(accentReplaceRegex, "", ending)
 
-                success, endingLengths, newEnding = getEndingDivision(entry["endingType"], parseData["pos"], ending, parseData)
+            success, endingLengths, newEnding = getEndingDivision(entry["endingType"], parseData["pos"], ending, parseData)
 
-                if not(success):
-                    continue
+            if not(success):
+                continue
 
-                allLengths = copy.deepcopy(stemVowelLengths[i])
+            allLengths = copy.deepcopy(stemVowelLengths[i])
 
-                if False:
-                    print accentlessToken
-                    print myStem
-                    print ending
-                    print allLengths
-                    print endingLengths
-                allLengths.extend(endingLengths)
-
-                if (len(defaultLens) == len(allLengths)): # until we figure out ai)dei=sqai type stuf;; TODO
-                    oneWorked = True
-                    if len(newEnding) == 0 or (newEnding[0] == "'" or newEnding[0] == ")" or newEnding[0] == "(" or newEnding[0] == "+"):
-                        newToken = myStem + newEnding# todo: add accent back in
-                    else:
-                        newToken = myStem + "." + newEnding# todo: add accent back in
-                    break
+            if False:
+                print accentlessToken
+                print myStem
+                print ending
+                print allLengths
+                print endingLengths
+            allLengths.extend(endingLengths)
+
+            if (len(defaultLens) == len(allLengths)): # until we figure out ai)dei=sqai type stuf;; TODO
+                oneWorked = True
+                if len(newEnding) == 0 or (newEnding[0] == "'" or newEnding[0] == ")" or newEnding[0] == "(" or newEnding[0] == "+"):
+                    newToken = myStem + newEnding# todo: add accent back in
+                else:
+                    newToken = myStem + "." + newEnding# todo: add accent back in
+                break
 
         if not(oneWorked):
             if (VERBOSE):
@@ -575,12 +785,13 @@ def unifyPossibleTokenVowelLengths(possibles):
 # given a word divided into phonemes and list of vowel lengths for the vowels
 # in the word, return a string representation of the phoneme division
 def buildPhonemeStringWithLengths(token, resultLengths):
-    phonemes = splitStringIntoPhonemes(token).split(".")
+    phonemes, defaultLengths = lexPhonemes(token)
     res = []
     vowelsSeen = 0
-    for p in phonemes:
+    for i in range(len(phonemes)):
+        p = phonemes[i]
         # vowel, including diphthong
-        if not(re.search(r'[aeiouhw]', p) == None):
+        if not(defaultLengths[i] == None):
             vowelResult = p + "[" + resultLengths[vowelsSeen] + "]"
             res.append(vowelResult)
             vowelsSeen += 1
@@ -691,44 +902,117 @@ def specialAdjustPhonemes(forms, phonemes):
 
 
 
+# maximum number of tokens whose phonemes are kept in the phoneme cache
+PHONEME_CACHE_SIZE = 50000
+
+# bounded, least-recently-used cache of the result of getTokenPhonemes for
+# each token and approach. Each entry also stores the fixed token and the
+# forms it was computed from, so the cache can be reused across texts whose
+# form data agree. The dictionary version changes whenever a dictionary from
+# different files (or, for a plain dict, a different object) is used, which
+# clears the cache (and the stem indexes used by getFormVowelLengths).
+class PhonemeCache:
+    def __init__(self, maxSize):
+        self.maxSize = maxSize
+        self.entries = OrderedDict()
+        self.dictionary = None
+        self.dictionarySource = None
+        self.dictionaryVersion = 0
+        self.hits = 0
+        self.misses = 0
+
+    # make sure the cache entries were computed with the given dictionary.
+    # The current dictionary is kept so its id can't be reused by another.
+    def useDictionary(self, dictionary):
+        source = getattr(dictionary, "version", id(dictionary))
+        if not(source == self.dictionarySource):
+            self.dictionary = dictionary
+            self.dictionarySource = source
+            self.dictionaryVersion += 1
+            self.entries.clear()
+            stemIndexes.clear()
+
+    # return the cached result for the key if it was computed from the forms
+    # formInfo currently has for its fixed token, otherwise None
+    def get(self, key, formInfo):
+        entry = self.entries.pop(key, None)
+        if (entry == None or not(formInfo[entry[0]] == entry[1])):
+            self.misses += 1
+            return None
+        # reinsert the entry so it is the most recently used
+        self.entries[key] = entry
+        self.hits += 1
+        return entry[2]
+
+    def put(self, key, fixed, forms, result):
+        if (len(self.entries) >= self.maxSize):
+            self.entries.popitem(last=False)
+        self.entries[key] = (fixed, forms, result)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def toString(self):
+        total = self.hits + self.misses
+        if (total == 0):
+            rate = 0.0
+        else:
+            rate = 100.0*self.hits/total
+        return "Phoneme cache: %d hits, %d misses (%.2f%%), %d entries, dictionary version %d" % (self.hits, self.misses, rate, len(self.entries), self.dictionaryVersion)
+
+phonemeCache = PhonemeCache(PHONEME_CACHE_SIZE)
+
 # given a token, plus form information and a dictionary, split the token into
 # phonemes, (if approach is NATIVE_SPEAKER, then vowels are given their lengths.)
+# Results are cached per token and approach in phonemeCache.
 def getTokenPhonemes(token, formInfo, dictionary, approach):
     if (not(token == "")):
-        #splitStringIntoPhonemes
-        fixed = generalUtils.fixToken(token)
-        #print token
-        forms = formInfo[fixed]
-        isEnclitic, isProclitic = getCliticism(forms)
-        if (approach == APPROACH.NATIVE_SPEAKER):
-            if (len(forms) > 0):
-                possibleTokenVowelLengths = map(lambda x: getFormVowelLengths(fixed, x, dictionary), forms)
-                success, resultLengths, resultToken = unifyPossibleTokenVowelLengths(possibleTokenVowelLengths)
+        phonemeCache.useDictionary(dictionary)
+        key = (token, approach)
+        result = phonemeCache.get(key, formInfo)
+        if (result == None):
+            fixed = generalUtils.fixToken(token)
+            forms = formInfo[fixed]
+            result = computeTokenPhonemes(token, fixed, forms, dictionary, approach)
+            phonemeCache.put(key, fixed, forms, result)
+        return result
 
-                if not(success):
-                    resultLengths = getDefaultLengths(fixed)
-                    resultToken = token
-            else:
-                # just default to the basic setup
+    else:
+        return "", False, False
+
+# split the given token (with fixed form fixed and possible parses forms)
+# into phonemes, returning the phonemes and whether the token is an
+# enclitic and a proclitic.
+def computeTokenPhonemes(token, fixed, forms, dictionary, approach):
+    isEnclitic, isProclitic = getCliticism(forms)
+    if (approach == APPROACH.NATIVE_SPEAKER):
+        if (len(forms) > 0):
+            possibleTokenVowelLengths = map(lambda x: getFormVowelLengths(fixed, x, dictionary), forms)
+            success, resultLengths, resultToken = unifyPossibleTokenVowelLengths(possibleTokenVowelLengths)
+
+            if not(success):
                 resultLengths = getDefaultLengths(fixed)
                 resultToken = token
+        else:
+            # just default to the basic setup
+            resultLengths = getDefaultLengths(fixed)
+            resultToken = token
 
 
-            if False:
-                print token
-                print resultToken
-                print "~~~~~"
-            result = buildPhonemeStringWithLengths(resultToken, resultLengths)
-            result = specialAdjustPhonemes(forms, result)
-            #print result
-            return result, isEnclitic, isProclitic
-        else: # approach == APPROACH.STUDENT
-            result = splitStringIntoPhonemes(token)
-            result = specialAdjustPhonemes(forms, result)
-            return result, isEnclitic, isProclitic
-
-    else:
-        return "", False, False
+        if False:
+            print token
+            print resultToken
+            print "~~~~~"
+        result = buildPhonemeStringWithLengths(resultToken, resultLengths)
+        result = specialAdjustPhonemes(forms, result)
+        #print result
+        return result, isEnclitic, isProclitic
+    else: # approach == APPROACH.STUDENT
+        result = splitStringIntoPhonemes(token)
+        result = specialAdjustPhonemes(forms, result)
+        return result, isEnclitic, isProclitic
 
 # given the text of a line, information about forms, a dictionary, and the
 # approach taken (student or native speaker), divide the line into phonemes
@@ -962,7 +1246,7 @@ def secondPassAdjustments(syllables):
         # if this is a word terminal -w and the previous syllable was -???e-
         if (i > 0 and syllables[i].wordEndVowel and not(syllables[i-1].wordEndVowel) and syllables[i].coreVowel == "w" and len(syllables[i].startConsonants) == 0 and syllables[i-1].coreVowel == "e"):
             # overwrite the last syllable with a combined one
-            combined = copy.deepcopy(syllables[i-1]);
+            combined = syllables[i-1].copy();
             current = syllables[i]
             combined.doubleVowel = True
             combined.wordEndVowel = current.wordEndVowel
@@ -984,7 +1268,7 @@ def secondPassAdjustments(syllables):
             # if this word ends with terminal -ewn genitive
         elif (i > 0 and not(syllables[i].wordEndVowel) and not(syllables[i-1].wordEndVowel) and syllables[i].coreVowel == "w" and len(syllables[i].startConsonants) == 0 and syllables[i-1].coreVowel == "e" and (syllables[i].endConsonant == "n" or (i < len(syllables) - 1 and (len(syllables[i+1].startConsonants) > 0) and syllables[i+1].startConsonants[0] == "n"))):
             # overwrite the last syllable with a combined one
-            combined = copy.deepcopy(syllables[i-1]);
+            combined = syllables[i-1].copy();
             current = syllables[i]
             combined.doubleVowel = True
             combined.wordEndVowel = current.wordEndVowel
@@ -1004,14 +1288,18 @@ def secondPassAdjustments(syllables):
 
 # in addition to second pass adjustments, also combine eoi into a single value
 def fifthPassAdjustments(syllables):
-    syllables = secondPassAdjustments(syllables)
+    return fifthPassOnlyAdjustments(secondPassAdjustments(syllables))
+
+# make the fifth pass adjustments that are not also part of the second pass;
+# that is, combine word terminal -eoi, -ea and -eas into single syllables.
+def fifthPassOnlyAdjustments(syllables):
     newSyllables = []
     for i in range(len(syllables)):
         syl = syllables[i]
         # if this is a word terminal -oi and the previous syllable was -???e-
         if (i > 0 and syllables[i].wordEndVowel and not(syllables[i-1].wordEndVowel) and syllables[i].coreVowel == "oi" and len(syllables[i].startConsonants) == 0 and syllables[i-1].coreVowel == "e"):
             # overwrite the last syllable with a combined one
-            combined = copy.deepcopy(syllables[i-1]);
+            combined = syllables[i-1].copy();
             current = syllables[i]
             combined.doubleVowel = True
             combined.wordEndVowel = current.wordEndVowel
@@ -1033,7 +1321,7 @@ def fifthPassAdjustments(syllables):
         # if this is a word terminal -ea
         elif (i > 0 and syllables[i].wordEndVowel and not(syllables[i-1].wordEndVowel) and syllables[i].coreVowel == "a" and len(syllables[i].startConsonants) == 0 and syllables[i-1].coreVowel == "e"):
             # overwrite the last syllable with a combined one
-            combined = copy.deepcopy(syllables[i-1]);
+            combined = syllables[i-1].copy();
             current = syllables[i]
             combined.doubleVowel = True
             combined.wordEndVowel = current.wordEndVowel
@@ -1056,7 +1344,7 @@ def fifthPassAdjustments(syllables):
         # if this is a word terminal -eas
         elif (i > 0 and not(syllables[i].wordEndVowel) and not(syllables[i-1].wordEndVowel) and syllables[i].coreVowel == "a" and len(syllables[i].startConsonants) == 0 and syllables[i-1].coreVowel == "e" and (syllables[i].endConsonant == "s" or (i < len(syllables) - 1 and (len(syllables[i+1].startConsonants) > 0) and syllables[i+1].startConsonants[0] == "s"))):
             # overwrite the last syllable with a combined one
-            combined = copy.deepcopy(syllables[i-1]);
+            combined = syllables[i-1].copy();
             current = syllables[i]
             combined.doubleVowel = True
             combined.wordEndVowel = current.wordEndVowel
@@ -1086,11 +1374,9 @@ def vowelLongOrDiphthong(syl, approach):
 
     return longVowel or diphthong
 
-# given a list of syllables, information about lemmas and forms, the pass,
-# and the approach (student or native speaker) give the syllables lengths
-def giveSyllablesLengths(inputSyllables, lemmaInfo, formInfo, passNumber, approach):
-    syllables = copy.deepcopy(inputSyllables)
-
+# given a list of syllables and the approach (student or native speaker),
+# set the base length of each syllable in place
+def assignSyllableLengths(syllables, approach):
     # calculate lengths
     for syl in syllables:
         # if the syllable has a final consonant or the next consonant is a
@@ -1119,6 +1405,9 @@ def giveSyllablesLengths(inputSyllables, lemmaInfo, formInfo, passNumber, approa
         print "Syllable Split:"
         print getSyllablesString(syllables)
 
+# given a list of syllables with lengths and the pass, make the adjustments
+# for that pass
+def applyPassAdjustments(syllables, passNumber):
     if (passNumber >= 5):
         return fifthPassAdjustments(syllables) # includes second pass stuff
     elif (passNumber == 2 or passNumber >= 4):
@@ -1126,123 +1415,347 @@ def giveSyllablesLengths(inputSyllables, lemmaInfo, formInfo, passNumber, approa
     else:
         return syllables
 
+# given a list of syllables, information about lemmas and forms, the pass,
+# and the approach (student or native speaker) give the syllables lengths
+def giveSyllablesLengths(inputSyllables, lemmaInfo, formInfo, passNumber, approach):
+    syllables = map(lambda syl: syl.copy(), inputSyllables)
+    assignSyllableLengths(syllables, approach)
+    return applyPassAdjustments(syllables, passNumber)
+
+# mark every syllable in the list as shared, so that anything changing them
+# later copies them first, and return the list
+def shareSyllables(syllables):
+    for syl in syllables:
+        syl.shared = True
+    return syllables
+
+# return a copy of a list of syllables that can be changed by the scansion
+# search (which sets lengths and moves consonants) without changing the
+# original syllables. The syllables themselves are only copied once they are
+# changed, so the original syllables must have been shared.
+def copySyllables(syllables):
+    return list(syllables)
+
+# matches the length marked on a vowel phoneme by the native speaker approach
+vowelLengthRegex = re.compile(r'([aeiouhw][^.\[ ]*)\[[sl\?]\]')
+
+# remove the lengths marked on the vowels in a phoneme string
+def stripVowelLengths(phonemes):
+    return vowelLengthRegex.sub(r'\1', phonemes)
+
+# return an unshared copy of the syllable without its vowel's marked length,
+# and with its length not yet assigned
+def removeVowelLength(syl):
+    result = syl.copy()
+    result.vowel = stripVowelLengths(syl.vowel)
+    result.vowelInherentLength = "?"
+    result.length = SYL.UNKNOWN
+    return result
+
+# object holding the stages of scanning a line that do not depend on the pass.
+# The syllables and their base lengths are calculated once, and the second and
+# fifth pass adjustments are each made once, the first time a pass needs them.
+# syllables, if given, are the line's syllables before lengths are assigned.
+class StagedLine:
+    def __init__(self, phonemes, approach, syllables=None):
+        if (syllables == None):
+            if (scanStats.enabled):
+                start = time.time()
+            syllables = getSyllables(phonemes, 1, approach)
+            if (scanStats.enabled):
+                scanStats.addTime("getSyllables", start)
+        if (scanStats.enabled):
+            start = time.time()
+        assignSyllableLengths(syllables, approach)
+        if (scanStats.enabled):
+            scanStats.addTime("assignSyllableLengths", start)
+        self.phonemes = phonemes
+        self.baseSyllables = shareSyllables(syllables)
+        self.secondPassSyllables = None
+        self.fifthPassSyllables = None
+
+    # return a StagedLine for the same line with another approach, given the
+    # phonemes for that approach. If they only differ from this line's
+    # phonemes by the marked vowel lengths (as the student phonemes usually
+    # do), the syllabification is reused and only the lengths are recalculated.
+    def restage(self, phonemes, approach):
+        if (stripVowelLengths(self.phonemes) == phonemes):
+            syllables = map(removeVowelLength, self.baseSyllables)
+            return StagedLine(phonemes, approach, syllables)
+        return StagedLine(phonemes, approach)
+
+    # return the syllables with lengths for the given pass; the result is a
+    # fresh list that the scansion search is free to change.
+    def getSyllablesForPass(self, passNumber):
+        return copySyllables(self.getSharedSyllablesForPass(passNumber))
+
+    # return the shared list of syllables with lengths for the given pass,
+    # which must not be changed
+    def getSharedSyllablesForPass(self, passNumber):
+        if (passNumber == 2 or passNumber >= 4):
+            if (self.secondPassSyllables == None):
+                if (scanStats.enabled):
+                    start = time.time()
+                self.secondPassSyllables = shareSyllables(secondPassAdjustments(self.baseSyllables))
+                if (scanStats.enabled):
+                    scanStats.addTime("passAdjustments", start)
+            syllables = self.secondPassSyllables
+            if (passNumber >= 5):
+                if (self.fifthPassSyllables == None):
+                    if (scanStats.enabled):
+                        start = time.time()
+                    self.fifthPassSyllables = shareSyllables(fifthPassOnlyAdjustments(self.secondPassSyllables))
+                    if (scanStats.enabled):
+                        scanStats.addTime("passAdjustments", start)
+                syllables = self.fifthPassSyllables
+        else:
+            syllables = self.baseSyllables
+        return syllables
+
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 # ~~~~ Scansion
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
-# determine if the syllables from start to end match the given foot type.
+# the number of syllables in each type of foot
+FOOT_LENGTHS = {FOOT.DACTYL: 3, FOOT.SPONDEE: 2, FOOT.FINAL: 2}
+
+# the feet guessed for each of the first five feet, in the order they are tried
+FOOT_GUESSES = [FOOT.DACTYL, FOOT.SPONDEE]
+
+# for each foot, the fewest and most syllables the feet from it to the end of
+# the line can take up
+FOOT_SUFFIX_SYLLABLES = {6: (FOOT_LENGTHS[FOOT.FINAL], FOOT_LENGTHS[FOOT.FINAL])}
+for footNumber in range(5, 0, -1):
+    (suffixMin, suffixMax) = FOOT_SUFFIX_SYLLABLES[footNumber + 1]
+    guessLengths = map(lambda f: FOOT_LENGTHS[f], FOOT_GUESSES)
+    FOOT_SUFFIX_SYLLABLES[footNumber] = (suffixMin + min(guessLengths), suffixMax + max(guessLengths))
+
+# the fewest and most syllables a line can have and still be scanned (12 and 17)
+MIN_LINE_SYLLABLES = FOOT_SUFFIX_SYLLABLES[1][0]
+MAX_LINE_SYLLABLES = FOOT_SUFFIX_SYLLABLES[1][1]
+
+# return true if the syllables from index on could fill the feet from foot on
+def syllableCountFits(numSyllables, index, foot):
+    (suffixMin, suffixMax) = FOOT_SUFFIX_SYLLABLES[foot]
+    return suffixMin <= numSyllables - index <= suffixMax
+
+# given the syllable codes of a line, return for each index whether a syllable
+# from that index on could be lengthened by ictus lengthening (a short
+# syllable at the end of a word). Searches from an index whose remaining
+# syllables can't fit the remaining feet are only pruned if there are none,
+# since lengthening happens even when a foot doesn't match, and so changes
+# the syllables the rest of the search sees.
+def getIctusPossibleAfter(codes):
+    possible = [False]*(len(codes) + 1)
+    for i in range(len(codes) - 1, -1, -1):
+        code = codes[i]
+        possible[i] = possible[i+1] or (not(code & CODE_CAN_BE_LONG) and (code & CODE_LAST_VOWEL_IN_WORD) != 0)
+    return possible
+
+# the relaxations tried at a foot when none of the stricter guesses lead to a
+# valid scan. Each entry holds the first pass the relaxation is allowed on,
+# whether mute/liquid pairs may be collapsed into a single consonant, and
+# whether ictus lengthening is allowed.
+FOOT_RELAXATIONS = [(1, False, False), (2, True, False), (3, True, True)]
+
+# bit flags for the syllable codes used by the scansion search
+CODE_CAN_BE_LONG = 1
+CODE_CAN_BE_SHORT = 2
+CODE_MUTE_LIQUID_NEXT = 4
+CODE_LAST_VOWEL_IN_WORD = 8
+
+# encode the parts of a syllable that matter for scansion as a set of bit flags
+def getSyllableCode(syl):
+    code = 0
+    if (syl.length == SYL.LONG or syl.length == SYL.UNKNOWN):
+        code |= CODE_CAN_BE_LONG
+    if (syl.length == SYL.SHORT or syl.length == SYL.UNKNOWN):
+        code |= CODE_CAN_BE_SHORT
+    if (syl.flags & FLAG_MUTE_LIQUID_NEXT):
+        code |= CODE_MUTE_LIQUID_NEXT
+    if (syl.flags & FLAG_LAST_VOWEL_IN_WORD):
+        code |= CODE_LAST_VOWEL_IN_WORD
+    return code
+
+# determine if the syllable codes starting at start match the given foot type.
 # if adjustMuteLiquids is true, collapse mute/liquid pairs from a double to
 # single consonant.
 # if ictusLengthening is true, allow the first syllable of a foot to be lengthened
 # if it is at the end of a word (technically more common when a pause follows,
-# but sometimes occurs with any word end)
-def matchesFoot(syllables, start, end, footType, adjustMuteLiquids, ictusLengthening):
-    if (end > len(syllables)):
-        return False
-    len1 = syllables[start].length
-    footOneCorrect = (len1 == SYL.LONG) or (len1 == SYL.UNKNOWN)
+# but sometimes occurs with any word end). Lengthening is applied to both the
+# code and the syllable itself, and happens even if the rest of the foot does
+# not match; the return value is whether the foot matches and whether a
+# syllable was lengthened.
+def matchesFoot(codes, syllables, start, footType, adjustMuteLiquids, ictusLengthening):
+    end = start + FOOT_LENGTHS[footType]
+    if (end > len(codes)):
+        return False, False
+    lengthened = False
+    code = codes[start]
+    footOneCorrect = (code & CODE_CAN_BE_LONG) != 0
     # apply ictus lengthening change
-    if (ictusLengthening and not(footOneCorrect)):
-        if(syllables[start].lastVowelInWord):
-            footOneCorrect = True
-            syllables[start].length = SYL.LONG
-            syllables[start].ictusLengthened = True
+    if (ictusLengthening and not(footOneCorrect) and (code & CODE_LAST_VOWEL_IN_WORD)):
+        footOneCorrect = True
+        codes[start] = (code | CODE_CAN_BE_LONG) & ~CODE_CAN_BE_SHORT
+        syl = getWritableSyllable(syllables, start)
+        syl.length = SYL.LONG
+        syl.ictusLengthened = True
+        lengthened = True
+    if not(footOneCorrect):
+        return False, lengthened
     # a spondee is two syllables, both long
     if footType == FOOT.SPONDEE:
-        rightSize = (end - start) == 2
-        len2 = syllables[start+1].length
-        footTwoCorrect = (len2 == SYL.LONG) or (len2 == SYL.UNKNOWN)
-        return (rightSize and footOneCorrect and footTwoCorrect)
+        return (codes[start+1] & CODE_CAN_BE_LONG) != 0, lengthened
     # a dactyl is three syllables, long short short
     elif footType == FOOT.DACTYL:
-        rightSize = (end - start) == 3
-        len2 = syllables[start+1].length
-        footTwoCorrect = (len2 == SYL.SHORT) or (len2 == SYL.UNKNOWN) or (adjustMuteLiquids and syllables[start+1].muteLiquidNext)
-        len3 = syllables[start+2].length
-        footThreeCorrect = (len3 == SYL.SHORT) or (len3 == SYL.UNKNOWN) or (adjustMuteLiquids and syllables[start+2].muteLiquidNext)
-        return (rightSize and footOneCorrect and footTwoCorrect and footThreeCorrect)
+        shortMask = CODE_CAN_BE_SHORT
+        if (adjustMuteLiquids):
+            shortMask |= CODE_MUTE_LIQUID_NEXT
+        return ((codes[start+1] & shortMask) != 0 and (codes[start+2] & shortMask) != 0), lengthened
     # the final foot is two syllables, a long and anything, and is at the end.
-    elif footType == FOOT.FINAL:
-        isEnd = end == len(syllables)
-        rightSize = (end - start) == 2
-        return (rightSize and footOneCorrect and isEnd)
     else:
-        return False
+        return end == len(codes), lengthened
 
 # given a set of syllables, and index to start at, the foot
 # we are currently examining, and the pass number (where later passes examine
-# more unlikely possibilities) return a list of the order of feet
-# for that given scansion and true if there is a valid scan, [], false
-# otherwise.
-def determineLengths(syllables, index, foot, passNum):
-    # Final foot handling
-    if (foot == 6):
-        if (matchesFoot(syllables, index, index+2, FOOT.FINAL, False, False)):
-            return [[FOOT.FINAL]], True
+# more unlikely possibilities) return a generator of the scans (as tuples of
+# the order of feet) for the syllables, which finds each scan only when it is
+# asked for.
+# The search is a walk over a table of (syllable index, foot) positions: at
+# each position we take the first relaxation that leads to any valid scan, and
+# the scans found from a position are reused by every path that reaches it.
+# Ictus lengthening changes syllable lengths mid-search, so table entries are
+# only reused if no syllable has been lengthened since they were computed, and
+# a position is only added to the table once all of its scans have been found.
+# Positions whose remaining syllables can't fill the remaining feet have no
+# scans, so they aren't searched (see getIctusPossibleAfter).
+def generateLengths(syllables, index, foot, passNum):
+    codes = map(getSyllableCode, syllables)
+    relaxations = filter(lambda r: r[0] <= passNum, FOOT_RELAXATIONS)
+    table = {}
+    # number of syllables lengthened so far, used to invalidate the table
+    numLengthened = [0]
+    if (passNum >= FOOT_RELAXATIONS[-1][0]):
+        ictusPossibleAfter = getIctusPossibleAfter(codes)
+    else:
+        ictusPossibleAfter = [False]*(len(codes) + 1)
+
+    def search(index, foot):
+        if not(syllableCountFits(len(codes), index, foot) or ictusPossibleAfter[min(index, len(codes))]):
+            return
+        key = (index, foot)
+        if (key in table and table[key][0] == numLengthened[0]):
+            for result in table[key][1]:
+                yield result
+            return
+        before = numLengthened[0]
+
+        results = []
+        if (foot == 6):
+            guesses = [FOOT.FINAL]
         else:
-            if(passNum >= 2):
-                if (matchesFoot(syllables, index, index+2, FOOT.FINAL, True, False)):
-                    return [[FOOT.FINAL]], True
-            if(passNum >= 3):
-                if (matchesFoot(syllables, index, index+2, FOOT.FINAL, True, True)):
-                    return [[FOOT.FINAL]], True
-            return [], False
+            guesses = FOOT_GUESSES
+        for (firstPass, adjustMuteLiquids, ictusLengthening) in relaxations:
+            for footType in guesses:
+                matches, lengthened = matchesFoot(codes, syllables, index, footType, adjustMuteLiquids, ictusLengthening)
+                if (lengthened):
+                    numLengthened[0] += 1
+                if not(matches):
+                    continue
+                if (footType == FOOT.FINAL):
+                    results.append((FOOT.FINAL,))
+                    yield (FOOT.FINAL,)
+                else:
+                    for rest in search(index + FOOT_LENGTHS[footType], foot + 1):
+                        result = (footType,) + rest
+                        results.append(result)
+                        yield result
+            if (len(results) > 0):
+                break
 
+        if (numLengthened[0] == before):
+            table[key] = (before, results)
 
-    results = []
-    # guess dactyl
-    if (matchesFoot(syllables, index, index+3, FOOT.DACTYL, False, False)):
-        reses, correct = determineLengths(syllables, index+3, foot + 1, passNum)
-        if (correct):
-            for res in reses:
-                res.insert(0, FOOT.DACTYL)
-                results.append(res)
-    # guess spondee
-    if (matchesFoot(syllables, index, index+2, FOOT.SPONDEE, False, False)):
-        reses, correct = determineLengths(syllables, index+2, foot + 1, passNum)
-        if (correct):
-            for res in reses:
-                res.insert(0, FOOT.SPONDEE)
-                results.append(res)
-    # if on pass 2 and no results yet, try converting mute/liquids from
-    # single to double syllables.
-    if (passNum >= 2 and len(results) == 0):
-        # guess dactyl
-        if (matchesFoot(syllables, index, index+3, FOOT.DACTYL, True, False)):
-            reses, correct = determineLengths(syllables, index+3, foot + 1, passNum)
-            if (correct):
-                for res in reses:
-                    res.insert(0, FOOT.DACTYL)
-                    results.append(res)
-        # guess spondee
-        if (matchesFoot(syllables, index, index+2, FOOT.SPONDEE, True, False)):
-            reses, correct = determineLengths(syllables, index+2, foot + 1, passNum)
-            if (correct):
-                for res in reses:
-                    res.insert(0, FOOT.SPONDEE)
-                    results.append(res)
-    # if on pass 3 and no results yet, allow ictus lengthening
-    if (passNum >= 3 and len(results) == 0):
-        # guess dactyl
-        if (matchesFoot(syllables, index, index+3, FOOT.DACTYL, True, True)):
-            reses, correct = determineLengths(syllables, index+3, foot + 1, passNum)
-            if (correct):
-                for res in reses:
-                    res.insert(0, FOOT.DACTYL)
-                    results.append(res)
-        # guess spondee
-        if (matchesFoot(syllables, index, index+2, FOOT.SPONDEE, True, True)):
-            reses, correct = determineLengths(syllables, index+2, foot + 1, passNum)
-            if (correct):
-                for res in reses:
-                    res.insert(0, FOOT.SPONDEE)
-                    results.append(res)
+    # a line without the right number of syllables has no scans
+    if not(syllableCountFits(len(codes), index, foot)):
+        return iter([])
+    return search(index, foot)
 
+# given a set of syllables, and index to start at, the foot
+# we are currently examining, and the pass number return a list of the order
+# of feet for each scansion and true if there is a valid scan, [], false
+# otherwise. If limit is given, at most that many scans are found.
+def determineLengths(syllables, index, foot, passNum, limit=None):
+    results = map(list, islice(generateLengths(syllables, index, foot, passNum), limit))
     if (len(results) > 0):
         return results, True
     else:
         return [], False
 
+# given a set of syllables and the pass number, return the number of valid
+# scans, as len(determineLengths(syllables, 0, 1, passNum)[0]) would, without
+# building them. The search is the same as generateLengths', but each position
+# keeps its number of scans rather than the scans themselves.
+def countScansions(syllables, passNum):
+    codes = map(getSyllableCode, syllables)
+    relaxations = filter(lambda r: r[0] <= passNum, FOOT_RELAXATIONS)
+    table = {}
+    numLengthened = [0]
+    if (passNum >= FOOT_RELAXATIONS[-1][0]):
+        ictusPossibleAfter = getIctusPossibleAfter(codes)
+    else:
+        ictusPossibleAfter = [False]*(len(codes) + 1)
+
+    def count(index, foot):
+        if not(syllableCountFits(len(codes), index, foot) or ictusPossibleAfter[min(index, len(codes))]):
+            return 0
+        key = (index, foot)
+        if (key in table and table[key][0] == numLengthened[0]):
+            return table[key][1]
+        before = numLengthened[0]
+
+        total = 0
+        if (foot == 6):
+            guesses = [FOOT.FINAL]
+        else:
+            guesses = FOOT_GUESSES
+        for (firstPass, adjustMuteLiquids, ictusLengthening) in relaxations:
+            for footType in guesses:
+                matches, lengthened = matchesFoot(codes, syllables, index, footType, adjustMuteLiquids, ictusLengthening)
+                if (lengthened):
+                    numLengthened[0] += 1
+                if not(matches):
+                    continue
+                if (footType == FOOT.FINAL):
+                    total += 1
+                else:
+                    total += count(index + FOOT_LENGTHS[footType], foot + 1)
+            if (total > 0):
+                break
+
+        if (numLengthened[0] == before):
+            table[key] = (before, total)
+        return total
+
+    if not(syllableCountFits(len(codes), 0, 1)):
+        return 0
+    return count(0, 1)
+
+# set the length of the syllable at index i of syllables if it is unknown
+def fillUnknownLength(syllables, i, length):
+    if (syllables[i].length == SYL.UNKNOWN):
+        getWritableSyllable(syllables, i).length = length
+
+# treat the mute/liquid pair after the syllable at index i as a single
+# consonant, making the syllable short and moving its end consonant to the
+# start of the next syllable
+def collapseMuteLiquid(syllables, i):
+    syl = getWritableSyllable(syllables, i)
+    nextSyl = getWritableSyllable(syllables, i+1)
+    syl.length = SYL.SHORT
+    nextSyl.startConsonants = [syl.endConsonant] + nextSyl.startConsonants
+    syl.endConsonant = ""
+
 # given a list of syllables without all lengths set, a set of the feet
 # in the scansion of the line, and the pass number, fill out the lengths in
 # the syllables and return a ScannedLine object
@@ -1250,38 +1763,27 @@ def createScannedLine(syllables, feet, passNum):
     index = 0;
     for foot in feet:
         if (foot == FOOT.DACTYL):
-            syl0 = syllables[index]
+            fillUnknownLength(syllables, index, SYL.LONG)
+            fillUnknownLength(syllables, index+1, SYL.SHORT)
+            fillUnknownLength(syllables, index+2, SYL.SHORT)
             syl1 = syllables[index+1]
-            syl2 = syllables[index+2]
-            if (syl0.length == SYL.UNKNOWN):
-                syl0.length = SYL.LONG
-            if (syl1.length == SYL.UNKNOWN):
-                syl1.length = SYL.SHORT
-            if (syl2.length == SYL.UNKNOWN):
-                syl2.length = SYL.SHORT
             if (passNum >= 2 and syl1.length == SYL.LONG and syl1.muteLiquidNext):
-                syl1.length = SYL.SHORT
-                syl2.startConsonants.insert(0, syl1.endConsonant)
-                syl1.endConsonant = ""
+                collapseMuteLiquid(syllables, index+1)
+            syl2 = syllables[index+2]
             if (passNum >= 2 and syl2.length == SYL.LONG and syl2.muteLiquidNext and len(syllables) - 1 >= index + 3):
-                syl2.length = SYL.SHORT
-                syllables[index+3].startConsonants.insert(0, syl2.endConsonant)
-                syl2.endConsonant = ""
+                collapseMuteLiquid(syllables, index+2)
             index += 3
         elif (foot == FOOT.SPONDEE or foot == FOOT.FINAL):
-            syl0 = syllables[index]
-            syl1 = syllables[index+1]
-            if (syl0.length == SYL.UNKNOWN):
-                syl0.length = SYL.LONG
-            if (syl1.length == SYL.UNKNOWN):
-                syl1.length = SYL.LONG
+            fillUnknownLength(syllables, index, SYL.LONG)
+            fillUnknownLength(syllables, index+1, SYL.LONG)
             index += 2
     return ScannedLine(syllables, feet)
 
 # given a list of syllables, some of them with lengths, the pass,
-# and the approach (student or native speaker), return a list of valid scans
-def getScansions(syllablesWithLengths, passNumber, approach):
-    (results, worked) = determineLengths(syllablesWithLengths, 0, 1, passNumber)
+# and the approach (student or native speaker), return a list of valid scans.
+# If limit is given, at most that many scans are found.
+def getScansions(syllablesWithLengths, passNumber, approach, limit=None):
+    (results, worked) = determineLengths(syllablesWithLengths, 0, 1, passNumber, limit)
     # if there is one valid result, we want to fill out all the values for
     # syllable lengths
     if (len(results) >= 1):
@@ -1292,6 +1794,107 @@ def getScansions(syllablesWithLengths, passNumber, approach):
     else:
         return results
 
+# given a list of syllables, some of them with lengths, and the pass, return a
+# generator of the valid scans, each a ScannedLine with its own syllables, which
+# finds each scan only when it is asked for. If limit is given, at most that
+# many scans are found.
+def iterScansions(syllablesWithLengths, passNumber, limit=None):
+    syllables = copySyllables(shareSyllables(syllablesWithLengths))
+    for feet in islice(generateLengths(syllables, 0, 1, passNumber), limit):
+        # share the syllables, so neither the search nor this scan change
+        # the other's
+        scanSyllables = copySyllables(shareSyllables(syllables))
+        yield createScannedLine(scanSyllables, list(feet), passNumber)
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# ~~~~ Batch Scansion
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+# Instead of searching line by line, test all 32 hexameter patterns against
+# many lines at once using arrays of syllable codes. This gives the same
+# results as determineLengths for the passes without ictus lengthening; ictus
+# lengthening changes the syllables during the search, so later passes must
+# still be scanned one line at a time.
+
+# the last pass that can be scanned in a batch
+BATCH_MAX_PASS = 2
+
+# all hexameter patterns, in the order determineLengths finds them
+BATCH_PATTERNS = map(lambda p: list(p) + [FOOT.FINAL], product(FOOT_GUESSES, repeat=5))
+
+# the number of syllables in the longest hexameter
+BATCH_WIDTH = 17
+
+# for each pattern, the index of the syllable each foot starts on, whether each
+# foot is a dactyl or the final foot, and the number of syllables in it
+BATCH_STARTS = np.array(map(lambda p: np.cumsum([0] + map(lambda f: FOOT_LENGTHS[f], p[:-1])), BATCH_PATTERNS))
+BATCH_IS_DACTYL = np.array(map(lambda p: map(lambda f: f == FOOT.DACTYL, p), BATCH_PATTERNS))
+BATCH_IS_FINAL = np.array(map(lambda p: map(lambda f: f == FOOT.FINAL, p), BATCH_PATTERNS))
+BATCH_TOTALS = np.array(map(lambda p: sum(map(lambda f: FOOT_LENGTHS[f], p)), BATCH_PATTERNS))
+
+# each foot of each pattern starts at a position in the search (a syllable
+# index and foot number); number the positions and mark which feet start at
+# each one, so we can tell if any pattern matches strictly from a position.
+BATCH_POSITION_IDS = {}
+for (p, k) in np.ndindex(*BATCH_STARTS.shape):
+    BATCH_POSITION_IDS.setdefault((BATCH_STARTS[p, k], k), len(BATCH_POSITION_IDS))
+BATCH_POSITIONS = np.array(map(lambda (p, k): BATCH_POSITION_IDS[(BATCH_STARTS[p, k], k)], np.ndindex(*BATCH_STARTS.shape))).reshape(BATCH_STARTS.shape)
+BATCH_POSITION_MATRIX = np.zeros((BATCH_POSITIONS.size, len(BATCH_POSITION_IDS)), dtype=int)
+BATCH_POSITION_MATRIX[np.arange(BATCH_POSITIONS.size), BATCH_POSITIONS.flatten()] = 1
+
+# given a list of syllable code lists, return an array with a row of codes
+# for each line (padded or cut to BATCH_WIDTH) and an array of line lengths
+def getBatchCodes(codeLists):
+    codes = np.zeros((len(codeLists), BATCH_WIDTH), dtype=int)
+    numSyllables = np.zeros(len(codeLists), dtype=int)
+    for i in range(len(codeLists)):
+        lineCodes = codeLists[i][:BATCH_WIDTH]
+        codes[i, :len(lineCodes)] = lineCodes
+        numSyllables[i] = len(codeLists[i])
+    return codes, numSyllables
+
+# given a list of syllable lists and the pass number (at most BATCH_MAX_PASS),
+# return the (results, worked) that determineLengths gives for each line.
+def determineLengthsInBatch(syllableLists, passNum):
+    if (len(syllableLists) == 0):
+        return []
+    codes, numSyllables = getBatchCodes(map(lambda syls: map(getSyllableCode, syls), syllableLists))
+
+    # the codes of the syllables in each foot of each pattern, for every line
+    first = codes[:, BATCH_STARTS]
+    second = codes[:, BATCH_STARTS + 1]
+    third = codes[:, np.minimum(BATCH_STARTS + 2, BATCH_WIDTH - 1)]
+
+    canBeLong = (first & CODE_CAN_BE_LONG) != 0
+    secondLong = (second & CODE_CAN_BE_LONG) != 0
+    strictDactyl = ((second & CODE_CAN_BE_SHORT) != 0) & ((third & CODE_CAN_BE_SHORT) != 0)
+    shortMask = CODE_CAN_BE_SHORT | CODE_MUTE_LIQUID_NEXT
+    relaxedDactyl = ((second & shortMask) != 0) & ((third & shortMask) != 0)
+
+    # whether each foot matches without and with mute/liquid collapsing
+    strict = canBeLong & np.where(BATCH_IS_DACTYL, strictDactyl, BATCH_IS_FINAL | secondLong)
+    relaxed = canBeLong & np.where(BATCH_IS_DACTYL, relaxedDactyl, BATCH_IS_FINAL | secondLong)
+    rightLength = (BATCH_TOTALS[np.newaxis, :] == numSyllables[:, np.newaxis])[:, :, np.newaxis]
+
+    if (passNum < 2):
+        accepted = np.all(strict & rightLength, axis=2)
+    else:
+        # determineLengths only collapses mute/liquid pairs at a position if no
+        # foot matches strictly there and leads to a valid scan.
+        relaxedAfter = np.logical_and.accumulate(relaxed[:, :, ::-1], axis=2)[:, :, ::-1]
+        relaxedAfter = np.concatenate([relaxedAfter[:, :, 1:], np.ones_like(relaxedAfter[:, :, :1])], axis=2)
+        strictLeadsToScan = strict & relaxedAfter & rightLength
+        strictAtPosition = np.dot(strictLeadsToScan.reshape(len(codes), -1), BATCH_POSITION_MATRIX) > 0
+        strictAtFoot = strictAtPosition[:, BATCH_POSITIONS]
+        accepted = np.all((strict | (~strictAtFoot & relaxed)) & rightLength, axis=2)
+
+    results = []
+    for lineAccepted in accepted:
+        scans = map(lambda i: list(BATCH_PATTERNS[i]), np.flatnonzero(lineAccepted))
+        results.append((scans, len(scans) > 0))
+    return results
+
+
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 # ~~~~ Feature Extraction
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
@@ -1673,8 +2276,11 @@ def getSuccessRate(myResults):
 
 # calculate and print the number of successfully scanned lines
 def printSuccessRate(myResults):
-    size = len(myResults)
-    success = getSuccessRate(myResults)
+    printSuccessCount(getSuccessRate(myResults), len(myResults))
+
+# print the number of successfully scanned lines, given that and the number of
+# lines
+def printSuccessCount(success, size):
     if (size == 0):
         print("Success on %d out of %d. (%.2f%%)" % (success, size, (0)))
     else:
@@ -1925,6 +2531,107 @@ def getFeatureResults(lineScansions, textName, divide_by_book):
     else:
         return [getFeatureResultsSingleText(lineScansions, textName, "Overall")]
 
+# running totals of the features of a series of line results, which give the
+# same features as getFeatureResultsSingleText without keeping the results.
+class FeatureAccumulator:
+    def __init__(self, textName, subName):
+        self.textName = textName
+        self.subName = subName
+        self.numLines = 0
+        self.numSuccessful = 0
+        self.spondaicism = [0, 0, 0, 0, 0]
+        self.spondaicRuns = [0, 0, 0, 0, 0]
+        self.anyCaesura = [0, 0, 0, 0, 0, 0]
+        self.masculineCaesura = [0, 0, 0, 0, 0, 0]
+        self.feminineCaesura = [0, 0, 0, 0, 0, 0]
+        self.principalCaesura = [0, 0, 0]
+        self.diaeresis = [0, 0, 0, 0, 0]
+        self.correption = [0, 0]
+        self.ictusLengthening = [0, 0, 0]
+        self.muteLiquid = [[0, 0], [0, 0], [0, 0]]
+        self.digamma = [[0, 0], [0, 0], [0, 0]]
+        self.meyersLaws = [0, 0, 0]
+
+    # add the result of scanning a line to the totals
+    def add(self, lineScan):
+        self.numLines += 1
+        if not(lineScan["Scan Result"] == 1):
+            return
+        features = lineScan["Features"]
+        self.numSuccessful += 1
+        addToTotals(self.spondaicism, features["feet"])
+        addToTotals(self.spondaicRuns, features["spondeeRuns"])
+        caesura = features["caesura"]
+        addToTotals(self.anyCaesura, caesura["anyCaesura"])
+        addToTotals(self.masculineCaesura, caesura["masculineCaesura"])
+        addToTotals(self.feminineCaesura, caesura["feminineCaesura"])
+        if (caesura["principalCaesura"] >= 0):
+            self.principalCaesura[caesura["principalCaesura"]] += 1
+        addToTotals(self.diaeresis, features["diaeresis"])
+        addToTotals(self.correption, features["correptionCount"])
+        addToTotals(self.ictusLengthening, features["ictusCount"])
+        for j in range(3):
+            addToTotals(self.muteLiquid[j], features["muteLiquidCount"][j])
+            addToTotals(self.digamma[j], features["digammaCount"][j])
+        addToTotals(self.meyersLaws, features["MeyersLaws"])
+
+    # return the features, in the layout of getFeatureResultsSingleText
+    def getResults(self):
+        features = {"TextName": self.textName, "SubName": self.subName}
+        features["NumLines"] = self.numLines
+        features["NumSuccessful"] = self.numSuccessful
+        features["Spondaicism"] = list(self.spondaicism)
+        features["SpondaicRuns"] = list(self.spondaicRuns)
+        features["CaesuraCounts"] = {
+            "anyCaesura": list(self.anyCaesura),
+            "masculineCaesura": list(self.masculineCaesura),
+            "feminineCaesura": list(self.feminineCaesura),
+            "principalCaesura": list(self.principalCaesura)
+        }
+        features["DiaeresisCounts"] = list(self.diaeresis)
+        features["Correption"] = list(self.correption)
+        features["IctusLengthening"] = list(self.ictusLengthening)
+        features["MuteLiquid"] = map(list, self.muteLiquid)
+        features["Digamma"] = map(list, self.digamma)
+        features["MeyersLaws"] = list(self.meyersLaws)
+        return features
+
+# add each of the values to the matching entry of totals
+def addToTotals(totals, values):
+    for j in range(len(totals)):
+        totals[j] += values[j]
+
+# running totals of the features of a text, overall and (if divideByBook is
+# true) for each book, which give the same features as getFeatureResults
+# without keeping the line results. Like getFeatureResults, a new book starts
+# whenever the book of a line differs from the line before it, and the
+# number of books is the book of the last line.
+class TextFeatureAccumulator:
+    def __init__(self, textName, divideByBook):
+        self.textName = textName
+        self.divideByBook = divideByBook
+        self.overall = FeatureAccumulator(textName, "Overall")
+        self.books = []
+        self.lastBook = None
+
+    def add(self, lineScan):
+        self.overall.add(lineScan)
+        if (self.divideByBook):
+            book = lineScan["Line"]["book"]
+            if (len(self.books) == 0 or not(book == self.lastBook)):
+                self.books.append(FeatureAccumulator(self.textName, "Book " + str(len(self.books) + 1)))
+                self.lastBook = book
+            self.books[-1].add(lineScan)
+
+    # return the features, in the layout of getFeatureResults
+    def getResults(self):
+        result = [self.overall.getResults()]
+        if (self.divideByBook):
+            numBooks = int(self.lastBook)
+            for i in range(numBooks):
+                result.append(self.books[i].getResults())
+        return result
+
 # write the feature results to an external file
 def saveFeatureResults(featureResults, textName, approach):
     outFileName = generalUtils.getTextFeatureDataOdikonFn(textName, approach)
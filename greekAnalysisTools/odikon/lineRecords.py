@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+# Stores the features of each scanned line of a text in a compact binary file,
+# one NumPy array per feature, so that the per-line features can be regrouped
+# (by book, by windows of lines, or any other selection of lines) without
+# scanning the text again. The grouped results have the same layout as
+# core.getFeatureResultsSingleText. Rolling-window series of the features are
+# computed from prefix sums of the records, so they take time linear in the
+# length of the text, whatever the window size.
+
+import numpy as np
+from ..shared import utils as generalUtils
+from ..shared import postprocess
+
+# the columns of a line record file. The true/false features of a line are
+# stored as the bits of a single number; bit i is the value for foot (or
+# break, or law) i.
+# scanned - 1 if the line was scanned successfully
+# book, line - the book and line number of the line
+# feet - the spondees in the first five feet
+# spondeeRuns - the spondee run category of the line (see extractSpondeeRuns)
+# caesuraAny, caesuraMasculine, caesuraFeminine - caesurae in each of the six feet
+# principalCaesura - the principal caesura, or -1 if there isn't one
+# diaeresis - diaereses after each of the first five feet
+# correption, ictus, muteLiquid, digamma - the counts from extractFeatures
+# meyersLaws - which of Meyer's laws the line follows
+RECORD_BIT_COLUMNS = [("feet", 5), ("spondeeRuns", 5), ("caesuraAny", 6),
+  ("caesuraMasculine", 6), ("caesuraFeminine", 6), ("diaeresis", 5),
+  ("meyersLaws", 3)]
+RECORD_COUNT_COLUMNS = [("correption", (2,)), ("ictus", (3,)),
+  ("muteLiquid", (3, 2)), ("digamma", (3, 2))]
+
+# return the number whose bits are the given list of 0s and 1s
+def getBits(values):
+    bits = 0
+    for i in range(len(values)):
+        if (values[i] == 1):
+            bits |= 1 << i
+    return bits
+
+# given the results of scanning the lines of a text, return its line records,
+# as a dictionary from column name to an array with a row for each line.
+def getLineRecords(results):
+    size = len(results)
+    records = {
+        "scanned": np.zeros(size, dtype=np.uint8),
+        "book": np.zeros(size, dtype=np.int32),
+        "line": np.zeros(size, dtype=np.int32),
+        "principalCaesura": np.full(size, -1, dtype=np.int8)
+    }
+    for (name, numBits) in RECORD_BIT_COLUMNS:
+        records[name] = np.zeros(size, dtype=np.uint8)
+    for (name, shape) in RECORD_COUNT_COLUMNS:
+        records[name] = np.zeros((size,) + shape, dtype=np.uint8)
+
+    for i in range(size):
+        result = results[i]
+        records["book"][i] = result["Line"]["book"]
+        records["line"][i] = result["Line"]["line"]
+        if (result["Scan Result"] == 1):
+            features = result["Features"]
+            caesura = features["caesura"]
+            records["scanned"][i] = 1
+            records["feet"][i] = getBits(features["feet"])
+            records["spondeeRuns"][i] = getBits(features["spondeeRuns"])
+            records["caesuraAny"][i] = getBits(caesura["anyCaesura"])
+            records["caesuraMasculine"][i] = getBits(caesura["masculineCaesura"])
+            records["caesuraFeminine"][i] = getBits(caesura["feminineCaesura"])
+            records["principalCaesura"][i] = caesura["principalCaesura"]
+            records["diaeresis"][i] = getBits(features["diaeresis"])
+            records["meyersLaws"][i] = getBits(features["MeyersLaws"])
+            records["correption"][i] = features["correptionCount"]
+            records["ictus"][i] = features["ictusCount"]
+            records["muteLiquid"][i] = features["muteLiquidCount"]
+            records["digamma"][i] = features["digammaCount"]
+    return records
+
+# write the line records of a text scanned with the given approach
+def saveLineRecords(records, textName, approach):
+    outFileName = generalUtils.getTextLineRecordsOdikonFn(textName, approach)
+    generalUtils.check_and_create_path(outFileName)
+    np.savez_compressed(outFileName, **records)
+
+# load the line records of a text scanned with the given approach
+def loadLineRecords(textName, approach):
+    data = np.load(generalUtils.getTextLineRecordsOdikonFn(textName, approach))
+    records = {}
+    for name in data.files:
+        records[name] = data[name]
+    data.close()
+    return records
+
+# return a matrix with a row for each line record, whose columns are all the
+# values that get added up by getFeatureResultsSingleText, in the order
+# read by getFeatureResultsFromTotals.
+def getRecordMatrix(records):
+    columns = [records["scanned"][:, np.newaxis]]
+    for (name, numBits) in RECORD_BIT_COLUMNS:
+        columns.append((records[name][:, np.newaxis] >> np.arange(numBits)) & 1)
+    columns.append(records["principalCaesura"][:, np.newaxis] == np.arange(3))
+    for (name, shape) in RECORD_COUNT_COLUMNS:
+        columns.append(records[name].reshape(len(records[name]), -1))
+    return np.hstack(map(lambda c: c.astype(np.int64), columns))
+
+# given the totals of the columns of getRecordMatrix for a group of numLines
+# lines, return the features for that group, as getFeatureResultsSingleText
+# would.
+def getFeatureResultsFromTotals(totals, numLines, textName, subName):
+    values = map(int, totals)
+    # take the next n values
+    def take(n):
+        taken = values[:n]
+        del values[:n]
+        return taken
+
+    features = {"TextName": textName, "SubName": subName}
+    features["NumLines"] = numLines
+    features["NumSuccessful"] = take(1)[0]
+    bits = {}
+    for (name, numBits) in RECORD_BIT_COLUMNS:
+        bits[name] = take(numBits)
+    principal = take(3)
+    counts = {}
+    for (name, shape) in RECORD_COUNT_COLUMNS:
+        counts[name] = take(int(np.prod(shape)))
+
+    features["Spondaicism"] = bits["feet"]
+    features["SpondaicRuns"] = bits["spondeeRuns"]
+    features["CaesuraCounts"] = {
+        "anyCaesura": bits["caesuraAny"],
+        "masculineCaesura": bits["caesuraMasculine"],
+        "feminineCaesura": bits["caesuraFeminine"],
+        "principalCaesura": principal
+    }
+    features["DiaeresisCounts"] = bits["diaeresis"]
+    features["Correption"] = counts["correption"]
+    features["IctusLengthening"] = counts["ictus"]
+    features["MuteLiquid"] = [counts["muteLiquid"][0:2], counts["muteLiquid"][2:4], counts["muteLiquid"][4:6]]
+    features["Digamma"] = [counts["digamma"][0:2], counts["digamma"][2:4], counts["digamma"][4:6]]
+    features["MeyersLaws"] = bits["meyersLaws"]
+    return features
+
+# return the features for the lines picked out by selection (a list of
+# indices or a boolean array) as getFeatureResultsSingleText would for
+# those lines.
+def getFeatureResultsForLines(records, textName, subName, selection):
+    matrix = getRecordMatrix(records)[selection]
+    return getFeatureResultsFromTotals(matrix.sum(axis=0), len(matrix), textName, subName)
+
+# return the features for groups of consecutive lines, where starts holds the
+# index of the first line of each group and names the name of each group.
+def getFeatureResultsForRuns(records, textName, starts, names):
+    matrix = getRecordMatrix(records)
+    if (len(starts) == 0):
+        return []
+    totals = np.add.reduceat(matrix, starts, axis=0)
+    sizes = np.diff(list(starts) + [len(matrix)])
+    results = []
+    for i in range(len(starts)):
+        results.append(getFeatureResultsFromTotals(totals[i], int(sizes[i]), textName, names[i]))
+    return results
+
+# given line records, return the overall features of the text and, if
+# divide_by_book is true, of each book, as core.getFeatureResults does.
+def getBookFeatureResults(records, textName, divide_by_book):
+    overall = getFeatureResultsForLines(records, textName, "Overall", slice(None))
+    if (divide_by_book):
+        books = records["book"]
+        numBooks = int(books[-1])
+        starts = np.flatnonzero(np.concatenate(([True], books[1:] != books[:-1])))[:numBooks]
+        names = map(lambda i: "Book " + str(i+1), range(numBooks))
+        return [overall] + getFeatureResultsForRuns(records, textName, starts, names)
+    else:
+        return [overall]
+
+# return the features of each window of windowSize consecutive lines (the
+# last window may be shorter)
+def getWindowFeatureResults(records, textName, windowSize):
+    size = len(records["scanned"])
+    starts = range(0, size, windowSize)
+    names = map(lambda start: "Lines %d-%d" % (start + 1, min(start + windowSize, size)), starts)
+    return getFeatureResultsForRuns(records, textName, starts, names)
+
+# return the totals of the columns of getRecordMatrix for each window of
+# windowSize consecutive lines, with a window starting every stride lines
+# (a text shorter than windowSize is a single window). The totals come from
+# prefix sums of the matrix, so each window takes the same time. Returns the
+# index of the first line of each window, the index after its last line, and
+# the totals, with a row per window.
+def getWindowTotals(records, windowSize, stride):
+    matrix = getRecordMatrix(records)
+    size = len(matrix)
+    prefix = np.zeros((size + 1, matrix.shape[1]), dtype=np.int64)
+    np.cumsum(matrix, axis=0, out=prefix[1:])
+    starts = np.arange(0, max(size - windowSize, 0) + 1, stride)
+    ends = np.minimum(starts + windowSize, size)
+    return starts, ends, prefix[ends] - prefix[starts]
+
+# return the features of each window of windowSize lines, starting every
+# stride lines, in the layout of getFeatureResultsSingleText
+def getWindowFeatureSeries(records, textName, windowSize, stride):
+    (starts, ends, totals) = getWindowTotals(records, windowSize, stride)
+    series = []
+    for i in range(len(starts)):
+        subName = "Lines %d-%d" % (starts[i] + 1, ends[i])
+        series.append(getFeatureResultsFromTotals(totals[i], int(ends[i] - starts[i]), textName, subName))
+    return series
+
+# return a matrix with a row for each window of windowSize lines, starting
+# every stride lines, holding the window's feature vector from
+# postprocess.cleanRawOdikon.
+def getWindowFeatureMatrix(records, textName, windowSize, stride):
+    series = getWindowFeatureSeries(records, textName, windowSize, stride)
+    return np.array(map(lambda raw: postprocess.cleanRawOdikon(raw, False), series))
@@ -2,7 +2,13 @@
 # This file is the portal for other programs to call processing functions.
 # The core code that actually does the scansion is in core.py.
 import json
-from utils import FOOT, VERBOSE, VERY_VERBOSE, APPROACH
+import time
+import multiprocessing
+from itertools import ifilter
+from utils import FOOT, SYL, VERBOSE, VERY_VERBOSE, APPROACH
+from stats import scanStats, saveScanStats
+from scanCache import scanLinesWithCache, printCacheRate
+import lineRecords
 import core
 from ..shared import utils as generalUtils
 
@@ -14,6 +20,14 @@ from ..shared import utils as generalUtils
 # Like fourth pass, but combine some stranger things than -ewn.
 NUM_PASSES = 5
 
+# the number of scans looked for on each pass; a line with more than one
+# valid scan is aborted, so there is no need to find any more than two (unless
+# they are all being printed)
+if (VERBOSE):
+    MAX_SCANS = None
+else:
+    MAX_SCANS = 2
+
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 # ~~~~ Scansion function
@@ -35,8 +49,19 @@ def scanLine(line, lemmaInfo, formInfo, dictionary, approach):
 
     # run through the pipeline, getting the phonemes, syllables, lengths,
     # and scansion.
-    worked = False;
-    phonemes = core.getPhonemes(text, formInfo, dictionary, approach)
+    stagedLine = stageLine(line, formInfo, dictionary, approach)
+    return scanStagedLine(line, stagedLine, approach, 1)
+
+# get the phonemes of the given line object, and from them the syllables with
+# their base lengths, which don't depend on the pass. If restageFrom is given,
+# it is the StagedLine for the line with another approach, and its
+# syllabification is reused if possible.
+def stageLine(line, formInfo, dictionary, approach, restageFrom=None):
+    if (scanStats.enabled):
+        start = time.time()
+    phonemes = core.getPhonemes(line["text"], formInfo, dictionary, approach)
+    if (scanStats.enabled):
+        scanStats.addTime("getPhonemes", start)
     if (VERBOSE):
         print "Line:"
         print line
@@ -44,21 +69,78 @@ def scanLine(line, lemmaInfo, formInfo, dictionary, approach):
         print "Phonemes:"
         print phonemes
         print "------------"
-    for passNumber in range(1, NUM_PASSES + 1):
+    if (restageFrom == None):
+        stagedLine = core.StagedLine(phonemes, approach)
+    else:
+        stagedLine = restageFrom.restage(phonemes, approach)
+    if (VERBOSE):
+        print "Syllables:"
+        print core.getSyllablesString(stagedLine.baseSyllables)
+        print "------------"
+    return stagedLine
+
+# return what decides the scans found on the given pass for a line with the
+# given StagedLine: the syllables for the pass, and which of the relaxations
+# in core.FOOT_RELAXATIONS can change anything. Collapsing mute/liquid pairs
+# can only matter if a syllable is followed by one, and ictus lengthening only
+# if a short syllable ends a word. Two passes with the same signature find the
+# same scans.
+def getPassSignature(stagedLine, passNumber):
+    syllables = stagedLine.getSharedSyllablesForPass(passNumber)
+    muteLiquids = passNumber >= 2 and any(map(lambda syl: syl.muteLiquidNext, syllables))
+    ictus = passNumber >= 3 and any(map(lambda syl: syl.length == SYL.SHORT and syl.lastVowelInWord, syllables))
+    return (syllables, muteLiquids, ictus)
+
+# return true if the syllables for the given pass of a line with the given
+# StagedLine can't make up a hexameter. The later passes only ever combine
+# syllables, so a line with too few syllables fails every pass.
+def wrongSyllableCount(stagedLine, passNumber):
+    if (len(stagedLine.baseSyllables) < core.MIN_LINE_SYLLABLES):
+        return True
+    numSyllables = len(stagedLine.getSharedSyllablesForPass(passNumber))
+    return not(core.MIN_LINE_SYLLABLES <= numSyllables <= core.MAX_LINE_SYLLABLES)
+
+# return true if the given pass can be skipped for a line with the given
+# StagedLine, because the line has the wrong number of syllables for it, or
+# because it has the same signature as one of the passes already tried on the
+# line (which must all have found no scans). triedPasses holds the signatures
+# of those passes, and has this pass's added if it isn't skipped.
+def skipPass(stagedLine, passNumber, approach, triedPasses):
+    if (wrongSyllableCount(stagedLine, passNumber)):
+        signature = None
+    else:
+        signature = getPassSignature(stagedLine, passNumber)
+    if (signature == None or signature in triedPasses):
+        if (scanStats.enabled):
+            scanStats.addSkippedPass(approach, passNumber)
+        return True
+    triedPasses.append(signature)
+    return False
+
+# scan the given line object, whose syllables are given by stagedLine,
+# starting at pass firstPass. Passes that can't find anything the passes
+# before them didn't are skipped; triedPasses holds the signatures of the
+# passes before firstPass (see skipPass).
+def scanStagedLine(line, stagedLine, approach, firstPass, triedPasses=None):
+    if (triedPasses == None):
+        triedPasses = []
+    resultScansion = None
+    validScans = 0
+    for passNumber in range(firstPass, NUM_PASSES + 1):
         #print "Pass: " + str(passNumber)
-        syllables = core.getSyllables(phonemes, passNumber, approach)
-        if (VERBOSE):
-            print "Syllables:"
-            print core.getSyllablesString(syllables)
-            print "------------"
-
-        syllablesWithLengths = core.giveSyllablesLengths(syllables, lemmaInfo, formInfo, passNumber, approach)
+        if (skipPass(stagedLine, passNumber, approach, triedPasses)):
+            continue
+        syllablesWithLengths = stagedLine.getSyllablesForPass(passNumber)
         if (VERBOSE):
             print "Syllables w/ lengths:"
             print core.getSyllablesString(syllablesWithLengths)
             print "------------"
 
-        scansions = core.getScansions(syllablesWithLengths, passNumber, approach)
+        if (scanStats.enabled):
+            start = time.time()
+        scansions = core.getScansions(syllablesWithLengths, passNumber, approach, MAX_SCANS)
+        if (scanStats.enabled):
+            scanStats.addTime("getScansions", start)
         validScans = len(scansions)
 
         if (VERBOSE):
@@ -76,15 +158,26 @@ def scanLine(line, lemmaInfo, formInfo, dictionary, approach):
         elif (validScans == 1):
             # valid scan found, break
             resultScansion = scansions[0]
-            worked = True;
             break
 
+    if (scanStats.enabled):
+        scanStats.addScanOutcome(approach, passNumber, validScans)
+    return getScanResult(line, resultScansion)
 
+# given a line object and its scansion (None if the scan failed), return the
+# result of scanning the line
+def getScanResult(line, resultScansion):
+    worked = not(resultScansion == None)
     lineStr = "Line %d: " % line["line"]
     if worked:
         #print "Feet 2: " + ",".join(finalGuess.feet)
         lineStr += "success. Feet: " + ",".join(resultScansion.feet) + "." #.feet
-        toReturn = {"Scan Result": 1, "Obj": resultScansion, "Features": core.extractFeatures(resultScansion), "Line": line}
+        if (scanStats.enabled):
+            start = time.time()
+        features = core.extractFeatures(resultScansion)
+        if (scanStats.enabled):
+            scanStats.addTime("extractFeatures", start)
+        toReturn = {"Scan Result": 1, "Obj": resultScansion, "Features": features, "Line": line}
     else:
         lineStr += "failed."
         toReturn = {"Scan Result": 0, "Obj": {}, "Line": line}
@@ -92,6 +185,235 @@ def scanLine(line, lemmaInfo, formInfo, dictionary, approach):
         print lineStr
     return toReturn
 
+# scan the given line with the given approach; if the approach is FALLBACK,
+# scan with the native speaker approach and, if that fails, with the student
+# approach, reusing the native speaker syllabification where possible.
+def scanLineByApproach(line, lemmaInfo, formInfo, dictionary, approach):
+    if (approach == APPROACH.FALLBACK):
+        if(line["text"].isspace()):
+            return {"Scan Result": 0, "Obj": {}, "Line": line}
+        nativeLine = stageLine(line, formInfo, dictionary, APPROACH.NATIVE_SPEAKER)
+        result = scanStagedLine(line, nativeLine, APPROACH.NATIVE_SPEAKER, 1)
+        if (result["Scan Result"] == 0):
+            studentLine = stageLine(line, formInfo, dictionary, APPROACH.STUDENT, nativeLine)
+            result = scanStagedLine(line, studentLine, APPROACH.STUDENT, 1)
+        return result
+    else:
+        return scanLine(line, lemmaInfo, formInfo, dictionary, approach)
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# ~~~~ Batch scanning
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+# scan a list of line objects, giving the same results as scanLineByApproach
+# on each line. The passes up to core.BATCH_MAX_PASS are scanned for all the
+# lines at once; lines that are still unscanned after that are scanned one at
+# a time.
+def scanLinesInBatch(lines, lemmaInfo, formInfo, dictionary, approach):
+    if (approach == APPROACH.FALLBACK):
+        nativeLines = stageLines(lines, formInfo, dictionary, APPROACH.NATIVE_SPEAKER, [None]*len(lines))
+        results = scanStagedLinesInBatch(lines, nativeLines, APPROACH.NATIVE_SPEAKER)
+        failed = filter(lambda i: results[i]["Scan Result"] == 0, range(len(results)))
+        failedLines = map(lambda i: lines[i], failed)
+        studentLines = stageLines(failedLines, formInfo, dictionary, APPROACH.STUDENT, map(lambda i: nativeLines[i], failed))
+        retried = scanStagedLinesInBatch(failedLines, studentLines, APPROACH.STUDENT)
+        for i, result in zip(failed, retried):
+            results[i] = result
+        return results
+    else:
+        stagedLines = stageLines(lines, formInfo, dictionary, approach, [None]*len(lines))
+        return scanStagedLinesInBatch(lines, stagedLines, approach)
+
+# stage each of the given line objects with stageLine, restaging from the
+# matching entry of restageFrom; blank lines are given None
+def stageLines(lines, formInfo, dictionary, approach, restageFrom):
+    stagedLines = []
+    for i in range(len(lines)):
+        if(lines[i]["text"].isspace()):
+            stagedLines.append(None)
+        else:
+            stagedLines.append(stageLine(lines[i], formInfo, dictionary, approach, restageFrom[i]))
+    return stagedLines
+
+# scan a list of line objects with scanLinesInBatch, given their StagedLines
+def scanStagedLinesInBatch(lines, stagedLines, approach):
+    results = [None]*len(lines)
+    triedPasses = map(lambda i: [], lines)
+    pending = []
+    for i in range(len(lines)):
+        if (stagedLines[i] == None):
+            results[i] = {"Scan Result": 0, "Obj": {}, "Line": lines[i]}
+        else:
+            pending.append(i)
+
+    for passNumber in range(1, core.BATCH_MAX_PASS + 1):
+        # lines that skip this pass stay pending for the next one
+        scanning = []
+        stillPending = []
+        for i in pending:
+            if (skipPass(stagedLines[i], passNumber, approach, triedPasses[i])):
+                stillPending.append(i)
+            else:
+                scanning.append(i)
+        syllableLists = map(lambda i: stagedLines[i].getSyllablesForPass(passNumber), scanning)
+        if (scanStats.enabled):
+            start = time.time()
+        batchResults = core.determineLengthsInBatch(syllableLists, passNumber)
+        if (scanStats.enabled):
+            scanStats.addTime("determineLengthsInBatch", start)
+        for j in range(len(scanning)):
+            i = scanning[j]
+            scans = batchResults[j][0]
+            if (scanStats.enabled and len(scans) > 0):
+                scanStats.addScanOutcome(approach, passNumber, len(scans))
+            if (len(scans) == 1):
+                scansion = core.createScannedLine(syllableLists[j], scans[0], passNumber)
+                results[i] = getScanResult(lines[i], scansion)
+            elif (len(scans) > 1):
+                # ambiguous, so the scan fails
+                results[i] = getScanResult(lines[i], None)
+            else:
+                stillPending.append(i)
+        pending = stillPending
+
+    for i in pending:
+        results[i] = scanStagedLine(lines[i], stagedLines[i], approach, core.BATCH_MAX_PASS + 1, triedPasses[i])
+    return results
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# ~~~~ Parallel scanning
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+# the scan data for a text, the approach used, whether to scan in batches,
+# and whether to record stats, loaded once in each worker process by
+# initScanWorker
+workerData = {}
+
+# load the scan data for the given text in a worker process
+def initScanWorker(textName, approach, batch, profile):
+    (lines, lemma, form, dictionary) = generalUtils.getScanData(textName)
+    workerData["lines"] = lines
+    workerData["lemma"] = lemma
+    workerData["form"] = form
+    workerData["dictionary"] = dictionary
+    workerData["approach"] = approach
+    workerData["batch"] = batch
+    scanStats.enabled = profile
+
+# scan the lines with the given indices in a worker process, returning the
+# results and the stats for scanning them (None if stats aren't recorded)
+def scanLinesInWorker(indices):
+    lines = workerData["lines"]
+    lemma = workerData["lemma"]
+    form = workerData["form"]
+    dictionary = workerData["dictionary"]
+    approach = workerData["approach"]
+    scanStats.reset()
+    cacheCounts = (core.phonemeCache.hits, core.phonemeCache.misses)
+    if (workerData["batch"]):
+        results = scanLinesInBatch(map(lambda i: lines[i], indices), lemma, form, dictionary, approach)
+    else:
+        results = map(lambda i: scanLineByApproach(lines[i], lemma, form, dictionary, approach), indices)
+    if (scanStats.enabled):
+        scanStats.addCacheCounts(core.phonemeCache.hits - cacheCounts[0], core.phonemeCache.misses - cacheCounts[1])
+        return results, scanStats.toDict()
+    return results, None
+
+# scan the lines of the given text with the given indices using numProcesses
+# worker processes, returning the results in the order of the indices
+def scanLinesInParallel(textName, indices, approach, numProcesses, batch):
+    # split the lines into contiguous chunks, a few per process so that
+    # slow chunks don't leave the other processes idle
+    chunkSize = max(1, len(indices) / (numProcesses * 4))
+    chunks = []
+    for start in range(0, len(indices), chunkSize):
+        chunks.append(indices[start:start + chunkSize])
+
+    pool = multiprocessing.Pool(numProcesses, initScanWorker, (textName, approach, batch, scanStats.enabled))
+    try:
+        chunkResults = pool.map(scanLinesInWorker, chunks)
+        pool.close()
+    except:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+
+    results = []
+    for (chunk, chunkStats) in chunkResults:
+        results.extend(chunk)
+        if not(chunkStats == None):
+            scanStats.merge(chunkStats)
+    return results
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# ~~~~ Repeated lines
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+# given a list of line objects, return the indices of the first occurrence of
+# each distinct line text, and for each line, the position of its text in that
+# list. The cleaned text is used as is, since any other change to it could
+# change its scansion.
+def getDistinctLines(lines):
+    distinctIndices = []
+    positions = {}
+    linePositions = []
+    for i in range(len(lines)):
+        text = lines[i]["text"]
+        if not(text in positions):
+            positions[text] = len(distinctIndices)
+            distinctIndices.append(i)
+        linePositions.append(positions[text])
+    return distinctIndices, linePositions
+
+# given a list of line objects, the results for their distinct lines, and
+# the position of each line's text in those results (from getDistinctLines),
+# return the results for every line, each with its own line object.
+def expandDistinctResults(lines, distinctResults, linePositions):
+    results = []
+    for i in range(len(lines)):
+        result = distinctResults[linePositions[i]]
+        if not(result["Line"] is lines[i]):
+            result = dict(result)
+            result["Line"] = lines[i]
+        results.append(result)
+    return results
+
+# print how many of the lines of a text repeated an earlier line, and so
+# didn't need to be scanned
+def printDedupRate(numDistinct, size):
+    repeated = size - numDistinct
+    if (size == 0):
+        print("Repeated lines: %d out of %d. (%.2f%%)" % (repeated, size, (0)))
+    else:
+        print("Repeated lines: %d out of %d. (%.2f%%)" % (repeated, size, (100.0*repeated/size)))
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# ~~~~ Streaming
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+# yield the line objects in a JSON-lines file (a JSON line object on each line
+# of the file), reading the file one line at a time
+def readJsonLines(fileName):
+    inFile = open(fileName, 'r')
+    try:
+        for fileLine in inFile:
+            if not(fileLine.isspace()):
+                yield json.loads(fileLine)
+    finally:
+        inFile.close()
+
+# scan the line objects from the given iterable one at a time, yielding the
+# result for each as soon as it is scanned, so that neither the lines nor the
+# results have to all be in memory at once.
+def scanLineStream(lines, formInfo, dictionary, approach):
+    for line in lines:
+        yield scanLineByApproach(line, None, formInfo, dictionary, approach)
+
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
@@ -106,30 +428,100 @@ def scanSingleLine(textName, line_number, approach):
     return scanLine(myLine, lemma, form, dictionary, approach)
 
 # get the scansions for an entire text
-def processText(textName, approach, printSuccess):
+# numProcesses is the number of processes to scan the lines with; if it is
+# more than 1, the lines are split between that many worker processes.
+# if batch is true, the lines are scanned with scanLinesInBatch.
+# if dedup is true, each distinct line text is only scanned once, and its
+# result is given to every line with that text.
+# if profile is true, the time spent in each stage and the pass each line was
+# resolved at are saved to a report next to the text's feature data.
+# if cache is true, the results of scanning each line are stored on disk, and
+# lines whose text, forms and dictionary entries haven't changed since they
+# were stored aren't scanned again.
+def processText(textName, approach, printSuccess, numProcesses=1, batch=False, dedup=False, profile=False, cache=False):
+    if (profile):
+        scanStats.reset()
+        scanStats.enabled = True
+        start = time.time()
+        cacheCounts = (core.phonemeCache.hits, core.phonemeCache.misses)
     (lines, lemma, form, dictionary) = generalUtils.getScanData(textName)
 
-    myResults = []
-
     size = len(lines)
-    for i in range(size):
-        myLine = lines[i]
-        if (approach == APPROACH.FALLBACK):
-            result = scanLine(myLine, lemma, form, dictionary, APPROACH.NATIVE_SPEAKER)
-            if (result["Scan Result"] == 0):
-                result = scanLine(myLine, lemma, form, dictionary, APPROACH.STUDENT)
+    if (dedup):
+        indices, linePositions = getDistinctLines(lines)
+    else:
+        indices = range(size)
+
+    # build the text's dictionary file before starting the workers, so they
+    # don't all find it out of date and rebuild it at once
+    if (numProcesses > 1):
+        dictionary.getEntries()
+
+    # scan the lines with the given indices
+    def scanLines(scanIndices):
+        if (numProcesses > 1):
+            return scanLinesInParallel(textName, scanIndices, approach, numProcesses, batch)
+        elif (batch):
+            return scanLinesInBatch(map(lambda i: lines[i], scanIndices), lemma, form, dictionary, approach)
         else:
-            result = scanLine(myLine, lemma, form, dictionary, approach)
-        myResults.append(result)
+            results = []
+            for i in scanIndices:
+                myLine = lines[i]
+                result = scanLineByApproach(myLine, lemma, form, dictionary, approach)
+                results.append(result)
+            return results
+
+    if (cache):
+        myResults, numCached = scanLinesWithCache(lines, indices, form, dictionary, approach, scanLines)
+    else:
+        myResults = scanLines(indices)
+    if (dedup):
+        myResults = expandDistinctResults(lines, myResults, linePositions)
     #%.2f" + str(success) + "" + str(size) + "" + str(100.0*success/size) + "
     if (printSuccess):
+        if (dedup):
+            printDedupRate(len(indices), size)
+        if (cache):
+            printCacheRate(numCached, len(indices))
         core.printSuccessRate(myResults)
+    if (VERBOSE):
+        print core.phonemeCache.toString()
+    if (profile):
+        scanStats.addCacheCounts(core.phonemeCache.hits - cacheCounts[0], core.phonemeCache.misses - cacheCounts[1])
+        scanStats.addTime("processText", start)
+        scanStats.enabled = False
+        saveScanStats(scanStats, textName, approach)
     numSuccesses = core.getSuccessRate(myResults)
 
     #core.printFeatureResults(myResults)
     return myResults, size, numSuccesses
 
 
+# get the feature results for a text from a stream of its cleaned line
+# objects, without keeping the lines or their results: lines is either the
+# name of a JSON-lines file or any iterable of line objects. The features are
+# added up as each line is scanned, so memory use doesn't grow with the
+# length of the text. Only the form data and dictionary for the text are
+# loaded up front.
+# Returns the feature results (as processFeatures gives them), the number of
+# lines and the number of lines scanned successfully.
+def processTextStream(textName, lines, approach, divide_by_book, printSuccess):
+    if (type(lines) == type("a") or type(lines) == type(u'a')):
+        lines = readJsonLines(lines)
+    (form, dictionary) = generalUtils.getScanFormData(textName)
+    lines = ifilter(lambda line: generalUtils.isScannedLine(textName, line), lines)
+
+    accumulator = core.TextFeatureAccumulator(textName, divide_by_book)
+    for result in scanLineStream(lines, form, dictionary, approach):
+        accumulator.add(result)
+
+    size = accumulator.overall.numLines
+    numSuccesses = accumulator.overall.numSuccessful
+    if (printSuccess):
+        core.printSuccessCount(numSuccesses, size)
+    return accumulator.getResults(), size, numSuccesses
+
+
 # compare the two approaches on a text
 def compareApproaches(textName):
     (lines, lemma, form, dictionary) = generalUtils.getScanData(textName)
@@ -289,7 +681,30 @@ def processFeatures(textName, divide_by_book, results, approach, printResults):
         if (printResults):
             core.reportOnFeatures(featureResults)
         core.saveFeatureResults(featureResults, textName, approach)
+        lineRecords.saveLineRecords(lineRecords.getLineRecords(results), textName, approach)
         return featureResults
 
     #core.printLineResults(myResults, False)
     #core.reportOnFeatures(lines, myResults)
+
+# regroup the features of a text whose features were saved by processFeatures,
+# without scanning it again. groups is a list of (subName, selection) pairs,
+# where selection picks out lines of the text as a list of indices or a
+# boolean array; the results have the same layout as processFeatures.
+def regroupFeatures(textName, approach, groups):
+    records = lineRecords.loadLineRecords(textName, approach)
+    return map(lambda (subName, selection): lineRecords.getFeatureResultsForLines(records, textName, subName, selection), groups)
+
+# get the features of each window of windowSize lines of a text whose features
+# were saved by processFeatures, without scanning it again.
+def processWindowFeatures(textName, approach, windowSize):
+    records = lineRecords.loadLineRecords(textName, approach)
+    return lineRecords.getWindowFeatureResults(records, textName, windowSize)
+
+# get a matrix with a row for each window of windowSize lines of a text,
+# starting every stride lines, whose columns are the cleaned Odikon features
+# of the window (as in postprocess.cleanRawOdikon). The text's features must
+# have been saved by processFeatures.
+def processFeatureSeries(textName, approach, windowSize, stride):
+    records = lineRecords.loadLineRecords(textName, approach)
+    return lineRecords.getWindowFeatureMatrix(records, textName, windowSize, stride)
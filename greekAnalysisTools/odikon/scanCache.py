@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+# Keeps the results of scanning lines on disk, so that rerunning the pipeline
+# after a small change (e.g. to one supplementary dictionary entry) only
+# rescans the lines whose inputs changed. Each result is stored under a hash
+# of everything the scan of the line depends on: the text of the line, the
+# forms of its tokens, the dictionary entries for the lemmas of those forms
+# (for approaches that use the dictionary), the approach, and the source of
+# the scanning code. The results are kept in an SQLite database, and whenever
+# it grows past its maximum size the least recently used results are removed.
+
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import core
+from utils import APPROACH
+from ..shared import utils as generalUtils
+
+# maximum total size (in bytes) of the stored results
+SCAN_CACHE_MAX_SIZE = 256*1024*1024
+
+# the source files the scan results depend on, relative to this folder. This
+# file is included since it holds the format the results are stored in.
+SCAN_CODE_FILES = ["core.py", "process.py", "utils.py", "../shared/utils.py", "scanCache.py"]
+
+# the number of keys looked up in a single query
+SCAN_CACHE_QUERY_SIZE = 500
+
+# a hash of the source files in SCAN_CODE_FILES, calculated once
+codeVersion = []
+
+# return a hash of the scanning code, so results from older code aren't used
+def getCodeVersion():
+    if (len(codeVersion) == 0):
+        folder = os.path.dirname(os.path.abspath(__file__))
+        h = hashlib.sha1()
+        for fn in SCAN_CODE_FILES:
+            h.update(generalUtils.getContent(os.path.join(folder, fn), False))
+        codeVersion.append(h.hexdigest())
+    return codeVersion[0]
+
+# return true if scanning with the given approach looks up dictionary entries;
+# the student approach only uses the form data
+def usesDictionary(approach):
+    return not(approach == APPROACH.STUDENT)
+
+# given a token, form info, a dictionary and whether to include dictionary
+# entries, return a string containing the forms of the token and, if
+# useDictionary is true, the dictionary entries of their lemmas (null if not
+# in the dictionary). Leaving the entries out means the dictionary isn't
+# loaded for approaches that don't need it.
+def getTokenKeyData(token, formInfo, dictionary, useDictionary):
+    forms = formInfo[generalUtils.fixToken(token)]
+    lemmas = sorted(set(map(lambda form: form.get("lemma"), forms)))
+    entries = []
+    if (useDictionary):
+        for lemma in lemmas:
+            if lemma in dictionary:
+                entries.append(dictionary[lemma])
+            else:
+                entries.append(None)
+    return json.dumps([token, forms, lemmas, entries], sort_keys=True)
+
+# given a line object, form info, a dictionary and the approach, return the
+# key for the line's scan result. tokenKeys holds the data from
+# getTokenKeyData for the tokens seen so far.
+def getLineKey(line, formInfo, dictionary, approach, tokenKeys):
+    text = line["text"]
+    h = hashlib.sha1()
+    h.update(getCodeVersion())
+    h.update("\n" + approach + "\n" + text.encode("utf-8"))
+    if not(text.isspace()):
+        for token in text.split(" "):
+            if (token == ""):
+                continue
+            if not(token in tokenKeys):
+                tokenKeys[token] = getTokenKeyData(token, formInfo, dictionary, usesDictionary(approach))
+            h.update("\n" + tokenKeys[token])
+    return h.hexdigest()
+
+# return the result of scanning a line as a JSON string. Only the scansion is
+# stored, since the features are extracted from it again when it is loaded.
+def serializeScanResult(result):
+    if (result["Scan Result"] == 0):
+        return json.dumps({"Scan Result": 0})
+    scannedLine = result["Obj"]
+    syllables = []
+    for syl in scannedLine.syllables:
+        syllables.append([syl.startConsonants, syl.vowel, syl.coreVowel,
+          syl.vowelInherentLength, syl.vowelAccent, syl.vowelBreathing,
+          syl.endConsonant, syl.length, syl.flags & ~core.FLAG_SHARED])
+    return json.dumps({"Scan Result": 1, "Feet": scannedLine.feet, "Syllables": syllables}, separators=(",", ":"))
+
+# given a string from serializeScanResult and the line object it is for,
+# return the result of scanning the line
+def deserializeScanResult(s, line):
+    data = json.loads(s)
+    if (data["Scan Result"] == 0):
+        return {"Scan Result": 0, "Obj": {}, "Line": line}
+    syllables = []
+    for sylData in data["Syllables"]:
+        syl = core.SyllableObj()
+        (syl.startConsonants, syl.vowel, syl.coreVowel, syl.vowelInherentLength,
+          syl.vowelAccent, syl.vowelBreathing, syl.endConsonant, syl.length,
+          syl.flags) = sylData
+        syllables.append(syl)
+    # the feet are compared against the FOOT constants, so use those
+    feet = map(str, data["Feet"])
+    scannedLine = core.ScannedLine(syllables, feet)
+    features = core.extractFeatures(scannedLine)
+    return {"Scan Result": 1, "Obj": scannedLine, "Features": features, "Line": line}
+
+# object holding the stored scan results, by key
+class ScanCache:
+    def __init__(self, filename, maxSize):
+        generalUtils.check_and_create_path(filename)
+        self.maxSize = maxSize
+        self.db = sqlite3.connect(filename)
+        self.db.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, result TEXT, size INTEGER, lastUsed REAL)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS resultsByUse ON results (lastUsed)")
+        self.db.commit()
+
+    # return a dictionary from each of the given keys that has a stored
+    # result to that result (as a string from serializeScanResult), marking
+    # those results as used.
+    def get(self, keys):
+        found = {}
+        for start in range(0, len(keys), SCAN_CACHE_QUERY_SIZE):
+            chunk = keys[start:start + SCAN_CACHE_QUERY_SIZE]
+            query = "SELECT key, result FROM results WHERE key IN (%s)" % ",".join("?"*len(chunk))
+            for (key, result) in self.db.execute(query, chunk):
+                found[str(key)] = result
+        now = time.time()
+        self.db.executemany("UPDATE results SET lastUsed = ? WHERE key = ?", map(lambda key: (now, key), found))
+        self.db.commit()
+        return found
+
+    # store the given list of (key, result string) pairs, then remove the
+    # least recently used results if the cache is too large.
+    def put(self, items):
+        now = time.time()
+        rows = map(lambda (key, result): (key, result, len(result), now), items)
+        self.db.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)", rows)
+        self.db.commit()
+        self.evict()
+
+    # remove the least recently used results until the total size is at most
+    # maxSize
+    def evict(self):
+        total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if (total <= self.maxSize):
+            return
+        removed = []
+        for (key, size) in self.db.execute("SELECT key, size FROM results ORDER BY lastUsed"):
+            if (total <= self.maxSize):
+                break
+            removed.append((key,))
+            total -= size
+        self.db.executemany("DELETE FROM results WHERE key = ?", removed)
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+# scan the lines of the given text with the given indices, reusing the stored
+# results for lines whose inputs haven't changed. scanLines is a function that
+# takes a list of indices and returns the results of scanning those lines.
+# Returns the results in the order of the indices and the number of lines
+# whose results were reused.
+def scanLinesWithCache(lines, indices, formInfo, dictionary, approach, scanLines):
+    cache = ScanCache(generalUtils.getScanCacheFn(), SCAN_CACHE_MAX_SIZE)
+    try:
+        tokenKeys = {}
+        keys = map(lambda i: getLineKey(lines[i], formInfo, dictionary, approach, tokenKeys), indices)
+        stored = cache.get(keys)
+
+        missing = filter(lambda j: not(keys[j] in stored), range(len(indices)))
+        if (len(missing) > 0):
+            scanned = scanLines(map(lambda j: indices[j], missing))
+        else:
+            scanned = []
+        cache.put(map(lambda (j, result): (keys[j], serializeScanResult(result)), zip(missing, scanned)))
+
+        results = [None]*len(indices)
+        for (j, result) in zip(missing, scanned):
+            results[j] = result
+        for j in range(len(indices)):
+            if (results[j] == None):
+                results[j] = deserializeScanResult(stored[keys[j]], lines[indices[j]])
+    finally:
+        cache.close()
+    return results, len(indices) - len(missing)
+
+# print how many of the scanned lines had their results reused
+def printCacheRate(numCached, size):
+    if (size == 0):
+        print("Stored scans reused: %d out of %d. (%.2f%%)" % (numCached, size, (0)))
+    else:
+        print("Stored scans reused: %d out of %d. (%.2f%%)" % (numCached, size, (100.0*numCached/size)))
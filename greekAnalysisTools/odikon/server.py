@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+# A local HTTP server that scans lines on request, so that individual lines can
+# be checked without reloading a text's line, form and lemma data and its
+# dictionary every time. The data for each text is loaded the first time the
+# text is asked for and kept until the LSJ dictionary files change, at which
+# point everything is reloaded.
+#
+# Every request is a POST with a JSON object as its body, holding textName,
+# approach (one of the APPROACH values; defaults to APPROACH.FALLBACK) and:
+# /scan-line - line, either a line number in the text or a line object (with
+#     text, and optionally book and line). Returns the result for the line.
+# /scan-batch - lines, a list of line numbers or line objects. Returns the
+#     result for each, along with the number of lines and successful scans.
+#     Large batches are split between worker processes.
+# /features - lines as for /scan-batch (all the lines of the text if left out)
+#     and divideByBook. Returns the features, as core.getFeatureResults does.
+
+import json
+import threading
+import multiprocessing
+import BaseHTTPServer
+import SocketServer
+import core
+import process
+from utils import APPROACH
+from ..shared import utils as generalUtils
+
+# the address the server listens on; it only accepts local connections
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8765
+
+# batches with fewer lines than this are scanned in the server process rather
+# than being split between the worker processes
+SERVER_MIN_PARALLEL_LINES = 100
+
+# the approaches that can be requested
+SERVER_APPROACHES = [APPROACH.STUDENT, APPROACH.NATIVE_SPEAKER, APPROACH.FALLBACK]
+
+# get the modification times of the LSJ dictionary files
+def getDictionaryTimes():
+    dictFileName = generalUtils.getProcessedDictionaryFn(generalUtils.DICTIONARY_NAMES.LSJ)
+    suppDictFileName = generalUtils.getSupplementaryDictionaryFn(generalUtils.DICTIONARY_NAMES.LSJ)
+    return (generalUtils.getFileTime(dictFileName), generalUtils.getFileTime(suppDictFileName))
+
+# scan the given line objects in a worker process started with
+# process.initScanWorker
+def scanLineObjectsInWorker(lines):
+    data = process.workerData
+    return map(lambda line: process.scanLineByApproach(line, data["lemma"], data["form"], data["dictionary"], data["approach"]), lines)
+
+# return the result of scanning a line in a form that can be sent as JSON
+def getResultJson(result):
+    resultJson = {"Scan Result": result["Scan Result"], "Line": result["Line"]}
+    if (result["Scan Result"] == 1):
+        resultJson["Feet"] = result["Obj"].feet
+        resultJson["Syllables"] = core.getSyllablesString(result["Obj"].syllables)
+        resultJson["Features"] = result["Features"]
+    return resultJson
+
+# object holding the data loaded by the server
+# texts holds the scan data (as from getScanData) for each text loaded so far.
+# pools holds a pool of worker processes, with the data for the text already
+# loaded, for each text and approach batches have been scanned with.
+# dictionaryTimes holds the modification times of the dictionary files when
+# the data was loaded.
+# Scanning uses caches shared by the whole process, so only one request is
+# scanned in the server process at a time.
+class ScanServerState:
+    def __init__(self, numProcesses):
+        self.numProcesses = numProcesses
+        self.texts = {}
+        self.pools = {}
+        self.dictionaryTimes = getDictionaryTimes()
+        self.lock = threading.Lock()
+        self.scanLock = threading.Lock()
+
+    # throw out the loaded data if the dictionary files have changed. Worker
+    # pools are closed rather than stopped, so batches already being scanned
+    # still finish.
+    def checkDictionary(self):
+        times = getDictionaryTimes()
+        if not(times == self.dictionaryTimes):
+            print "Dictionary changed, reloading."
+            self.dictionaryTimes = times
+            self.texts = {}
+            self.closePools()
+
+    def closePools(self):
+        for pool in self.pools.values():
+            pool.close()
+            threading.Thread(target=pool.join).start()
+        self.pools = {}
+
+    # get the scan data for a text, loading it if needed
+    def getText(self, textName):
+        with self.lock:
+            self.checkDictionary()
+            if not(textName in self.texts):
+                (lines, lemma, form, dictionary) = generalUtils.getScanData(textName)
+                # load the dictionary now, so the worker processes don't all
+                # rebuild the text's dictionary file at once
+                dictionary.getEntries()
+                self.texts[textName] = (lines, lemma, form, dictionary)
+            return self.texts[textName]
+
+    # get the worker pool for a text and approach, starting it if needed
+    def getPool(self, textName, approach):
+        key = (textName, approach)
+        with self.lock:
+            if not(key in self.pools):
+                self.pools[key] = multiprocessing.Pool(self.numProcesses, process.initScanWorker, (textName, approach, False, False))
+            return self.pools[key]
+
+    # scan the given line objects of a text with the given approach
+    def scanLines(self, textName, approach, lines):
+        (textLines, lemma, form, dictionary) = self.getText(textName)
+        if (len(lines) < SERVER_MIN_PARALLEL_LINES or self.numProcesses <= 1):
+            with self.scanLock:
+                return map(lambda line: process.scanLineByApproach(line, lemma, form, dictionary, approach), lines)
+
+        chunkSize = max(1, len(lines) / (self.numProcesses * 4))
+        chunks = []
+        for start in range(0, len(lines), chunkSize):
+            chunks.append(lines[start:start + chunkSize])
+        results = []
+        for chunk in self.getPool(textName, approach).map(scanLineObjectsInWorker, chunks):
+            results.extend(chunk)
+        return results
+
+    def close(self):
+        with self.lock:
+            self.closePools()
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# ~~~~ Endpoints
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+# get the text name and approach of a request
+def getRequestText(request):
+    if not("textName" in request):
+        raise ValueError("No textName given")
+    approach = request.get("approach", APPROACH.FALLBACK)
+    if not(approach in SERVER_APPROACHES):
+        raise ValueError("Unknown approach " + str(approach))
+    return (request["textName"], approach)
+
+# given a line number or line object from a request and the scan data for the
+# text, return the line object to scan
+def getLine(textName, text, requestLine):
+    (lines, lemma, form, dictionary) = text
+    if (type(requestLine) == type(1)):
+        if (requestLine < 1 or requestLine > len(lines)):
+            raise ValueError("%s has no line %d" % (textName, requestLine))
+        return lines[requestLine-1]
+    if not(type(requestLine) == type({}) and "text" in requestLine):
+        raise ValueError("A line must be a line number or an object with text")
+    line = {"text": requestLine["text"], "book": requestLine.get("book", 0), "line": requestLine.get("line", 0)}
+    for token in line["text"].split(" "):
+        if not(token == "") and not(generalUtils.fixToken(token) in form):
+            raise ValueError("No form data for " + token + " in " + textName)
+    return line
+
+# get the line objects a request asks for; all the lines of the text if
+# allLines is true and none are given
+def getRequestLines(state, request, allLines):
+    (textName, approach) = getRequestText(request)
+    text = state.getText(textName)
+    if (allLines and not("lines" in request)):
+        return text[0]
+    if not(type(request.get("lines")) == type([])):
+        raise ValueError("No list of lines given")
+    return map(lambda requestLine: getLine(textName, text, requestLine), request["lines"])
+
+def scanLineEndpoint(state, request):
+    (textName, approach) = getRequestText(request)
+    if not("line" in request):
+        raise ValueError("No line given")
+    line = getLine(textName, state.getText(textName), request["line"])
+    return getResultJson(state.scanLines(textName, approach, [line])[0])
+
+def scanBatchEndpoint(state, request):
+    (textName, approach) = getRequestText(request)
+    results = state.scanLines(textName, approach, getRequestLines(state, request, False))
+    return {
+        "Results": map(getResultJson, results),
+        "NumLines": len(results),
+        "NumSuccessful": core.getSuccessRate(results)
+    }
+
+def featuresEndpoint(state, request):
+    (textName, approach) = getRequestText(request)
+    results = state.scanLines(textName, approach, getRequestLines(state, request, True))
+    return core.getFeatureResults(results, textName, request.get("divideByBook", False))
+
+SERVER_ENDPOINTS = {
+    "/scan-line": scanLineEndpoint,
+    "/scan-batch": scanBatchEndpoint,
+    "/features": featuresEndpoint
+}
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# ~~~~ Server
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+class ScanRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    def do_POST(self):
+        if not(self.path in SERVER_ENDPOINTS):
+            self.sendJson(404, {"Error": "Unknown endpoint " + self.path})
+            return
+        try:
+            length = int(self.headers.getheader("content-length", 0))
+            request = json.loads(self.rfile.read(length))
+            if not(type(request) == type({})):
+                raise ValueError("The request must be a JSON object")
+            response = SERVER_ENDPOINTS[self.path](self.server.state, request)
+        except ValueError as e:
+            self.sendJson(400, {"Error": str(e)})
+            return
+        except Exception as e:
+            self.sendJson(500, {"Error": str(e)})
+            return
+        self.sendJson(200, response)
+
+    def sendJson(self, status, content):
+        body = json.dumps(content)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+# an HTTP server that handles each request in its own thread
+class ScanServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, numProcesses):
+        BaseHTTPServer.HTTPServer.__init__(self, address, ScanRequestHandler)
+        self.state = ScanServerState(numProcesses)
+
+# run the scan server until it is interrupted, with the given number of
+# worker processes for scanning batches
+def runScanServer(port=SERVER_PORT, numProcesses=multiprocessing.cpu_count()):
+    server = ScanServer((SERVER_HOST, port), numProcesses)
+    print "Odikon server listening on http://%s:%d" % (SERVER_HOST, port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.state.close()
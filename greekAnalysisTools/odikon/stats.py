@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+# Keeps track of where the time goes when scanning a text: how long each
+# stage of the pipeline takes, which pass each line is resolved at, and how
+# well the caches are doing. Nothing is recorded unless scanStats.enabled is
+# set, and the scanning code checks that before reading the clock, so it costs
+# almost nothing when turned off.
+
+import time
+import json
+from ..shared import utils as generalUtils
+
+# object holding the timing and counters for a scan
+# stageTimes and stageCalls hold the total time spent in and the number of
+# calls to each stage, by stage name.
+# approaches holds, for each approach, the number of lines scanned, the
+# number resolved and aborted (more than one valid scan) at each pass, and
+# the number that failed every pass, and the number of times each pass was
+# skipped because it couldn't change the outcome.
+# cacheHits and cacheMisses count lookups in the phoneme cache.
+class ScanStats:
+    def __init__(self):
+        self.enabled = False
+        self.reset()
+
+    def reset(self):
+        self.stageTimes = {}
+        self.stageCalls = {}
+        self.approaches = {}
+        self.cacheHits = 0
+        self.cacheMisses = 0
+
+    # add the time since start (from time.time()) to the given stage
+    def addTime(self, stage, start):
+        elapsed = time.time() - start
+        self.stageTimes[stage] = self.stageTimes.get(stage, 0) + elapsed
+        self.stageCalls[stage] = self.stageCalls.get(stage, 0) + 1
+
+    def getApproachCounts(self, approach):
+        if not(approach in self.approaches):
+            self.approaches[approach] = {"Lines": 0, "Resolved": {}, "Aborted": {}, "Failed": 0, "Skipped": {}}
+        return self.approaches[approach]
+
+    # record that a line was scanned with the given approach; passNumber is
+    # the pass the scan ended on and validScans the number of scans found
+    # there (0 if every pass failed)
+    def addScanOutcome(self, approach, passNumber, validScans):
+        counts = self.getApproachCounts(approach)
+        counts["Lines"] += 1
+        if (validScans == 0):
+            counts["Failed"] += 1
+        else:
+            if (validScans == 1):
+                byPass = counts["Resolved"]
+            else:
+                byPass = counts["Aborted"]
+            byPass[passNumber] = byPass.get(passNumber, 0) + 1
+
+    # record that the given pass was skipped for a line scanned with the
+    # given approach
+    def addSkippedPass(self, approach, passNumber):
+        skipped = self.getApproachCounts(approach)["Skipped"]
+        skipped[passNumber] = skipped.get(passNumber, 0) + 1
+
+    def addCacheCounts(self, hits, misses):
+        self.cacheHits += hits
+        self.cacheMisses += misses
+
+    # return the stats as a dictionary that can be saved as JSON or merged
+    # into another ScanStats
+    def toDict(self):
+        total = self.cacheHits + self.cacheMisses
+        if (total == 0):
+            hitRate = 0.0
+        else:
+            hitRate = 1.0*self.cacheHits/total
+        return {
+            "StageTimes": self.stageTimes,
+            "StageCalls": self.stageCalls,
+            "Approaches": self.approaches,
+            "PhonemeCache": {"Hits": self.cacheHits, "Misses": self.cacheMisses, "HitRate": hitRate}
+        }
+
+    # add the stats in a dictionary from toDict to these stats
+    def merge(self, other):
+        for stage in other["StageTimes"]:
+            self.stageTimes[stage] = self.stageTimes.get(stage, 0) + other["StageTimes"][stage]
+            self.stageCalls[stage] = self.stageCalls.get(stage, 0) + other["StageCalls"][stage]
+        for approach in other["Approaches"]:
+            counts = self.getApproachCounts(approach)
+            otherCounts = other["Approaches"][approach]
+            counts["Lines"] += otherCounts["Lines"]
+            counts["Failed"] += otherCounts["Failed"]
+            for outcome in ["Resolved", "Aborted", "Skipped"]:
+                for passNumber in otherCounts[outcome]:
+                    counts[outcome][passNumber] = counts[outcome].get(passNumber, 0) + otherCounts[outcome][passNumber]
+        self.addCacheCounts(other["PhonemeCache"]["Hits"], other["PhonemeCache"]["Misses"])
+
+# the stats for the scan currently running
+scanStats = ScanStats()
+
+# save the stats for a text scanned with the given approach next to its
+# feature data
+def saveScanStats(stats, textName, approach):
+    outFileName = generalUtils.getTextScanStatsOdikonFn(textName, approach)
+    generalUtils.safeWrite(outFileName, json.dumps(stats.toDict()))
@@ -9,6 +9,7 @@ import json
 import sys
 import copy
 import errno
+import threading
 
 
 
@@ -634,12 +635,25 @@ def getTextLemmasFn(textName):
 # get the filename containing the lemma data of a text given the text's name
 def getTextLemmaDataFn(textName):
     return "intermediateFiles/" + textName + "/lemmaData.json"
+# get the filename containing the dictionary entries for the lemmas of a text
+# given the text's name
+def getTextDictionaryFn(textName):
+    return "intermediateFiles/" + textName + "/dictionary.json"
+# get the filename for the stored odikon scan results of every text
+def getScanCacheFn():
+    return "intermediateFiles/scanCache.db"
 # get the directory for the feature data
 def getTextFeatureDataDir():
     return "intermediateFiles/feature_data/"
 # get the filename for the text feature data
 def getTextFeatureDataOdikonFn(textName, approach):
     return getTextFeatureDataDir() + "odikon_" + approach + "/" + textName + ".json"
+# get the filename for the odikon timing and counters of a text
+def getTextScanStatsOdikonFn(textName, approach):
+    return getTextFeatureDataDir() + "odikon_" + approach + "/" + textName + "_scanStats.json"
+# get the filename for the odikon per-line feature records of a text
+def getTextLineRecordsOdikonFn(textName, approach):
+    return getTextFeatureDataDir() + "odikon_" + approach + "/" + textName + "_lineRecords.npz"
 def getTextFeatureDataTamnonFn(textName):
     return getTextFeatureDataDir() + "tamnon/"+ textName + ".json"
 # get the filename for the ground truth scan data
@@ -719,6 +733,17 @@ def safeWrite(filename, content):
     out_file.write(content)
     out_file.close()
 
+# write the given content to a file, like safeWrite, but by writing a temporary
+# file in the same folder and renaming it over the target, so another process
+# reading the file never sees it partly written
+def atomicWrite(filename, content):
+    check_and_create_path(filename)
+    tempName = "%s.%d.%d.tmp" % (filename, os.getpid(), threading.current_thread().ident)
+    out_file = open(tempName, "w")
+    out_file.write(content)
+    out_file.close()
+    os.rename(tempName, filename)
+
 # get the content from a given file by reading it
 # parseJSON is true if we should parse the contents as JSON first
 def getContent(inFileName, parseJSON):
@@ -736,39 +761,112 @@ def getContent(inFileName, parseJSON):
 # ==============================================================================
 
 
+# merged dictionaries that have been loaded, by the names of their files, along
+# with the modification times of those files when they were loaded
+loadedDictionaries = {}
+
+# get the modification time of a file, or None if it doesn't exist
+def getFileTime(fileName):
+    if os.path.exists(fileName):
+        return os.path.getmtime(fileName)
+    else:
+        return None
+
+# get the dictionary in dictFileName with the entries of the supplementary
+# dictionary in suppDictFileName added. The same dictionary object is returned
+# until one of the files changes.
+def getMergedDictionary(dictFileName, suppDictFileName):
+    key = (dictFileName, suppDictFileName)
+    fileTimes = (getFileTime(dictFileName), getFileTime(suppDictFileName))
+    if (key in loadedDictionaries and loadedDictionaries[key][0] == fileTimes):
+        return loadedDictionaries[key][1]
+
+    dictionary = getContent(dictFileName, True)["dict"]
+    suppDictionary = getContent(suppDictFileName, True)["dict"]
+
+    for k in suppDictionary:
+        dictionary[k] = suppDictionary[k]
+
+    loadedDictionaries[key] = (fileTimes, dictionary)
+    return dictionary
+
+# the entries of the merged LSJ dictionary for the lemmas used in a text,
+# which are only loaded the first time an entry is looked up. They are kept
+# in a file for the text, which is rebuilt from the full dictionary if it is
+# older than the text's form data or either dictionary file.
+# version identifies the dictionary files the entries come from, so
+# dictionaries for different texts from the same files have the same version.
+class TextDictionary:
+    def __init__(self, textName, formData):
+        self.textName = textName
+        self.formData = formData
+        self.dictFileName = getProcessedDictionaryFn(DICTIONARY_NAMES.LSJ)
+        self.suppDictFileName = getSupplementaryDictionaryFn(DICTIONARY_NAMES.LSJ)
+        self.version = (self.dictFileName, getFileTime(self.dictFileName), self.suppDictFileName, getFileTime(self.suppDictFileName))
+        self.entries = None
+
+    # get the entries, loading them if that hasn't happened yet
+    def getEntries(self):
+        if (self.entries == None):
+            self.entries = self.loadEntries()
+        return self.entries
+
+    # load the entries from the text's dictionary file, building it first if
+    # it is out of date
+    def loadEntries(self):
+        fileName = getTextDictionaryFn(self.textName)
+        fileTime = getFileTime(fileName)
+        sourceTimes = [getFileTime(getTextFormDataFn(self.textName)), self.version[1], self.version[3]]
+        if not(fileTime == None) and all(map(lambda t: t == None or t <= fileTime, sourceTimes)):
+            return getContent(fileName, True)["dict"]
+
+        fullDictionary = getMergedDictionary(self.dictFileName, self.suppDictFileName)
+        entries = {}
+        for form in self.formData:
+            for parse in form[1]:
+                lemma = parse["lemma"]
+                if lemma in fullDictionary:
+                    entries[lemma] = fullDictionary[lemma]
+        atomicWrite(fileName, json.dumps({"dict": entries}))
+        return entries
+
+    def __contains__(self, lemma):
+        return lemma in self.getEntries()
+
+    def __getitem__(self, lemma):
+        return self.getEntries()[lemma]
+
 # get the line, lemma, and form data for a given text
 def getScanData(textName):
     lineFileName = getTextCleanFn(textName)
     lemmaFileName = getTextLemmaDataFn(textName)
-    formFileName = getTextFormDataFn(textName)
-    dictFileName = getProcessedDictionaryFn(DICTIONARY_NAMES.LSJ)
-    suppDictFileName = getSupplementaryDictionaryFn(DICTIONARY_NAMES.LSJ)
     lines = getContent(lineFileName, True)
     lemma = getContent(lemmaFileName, True)
-    formData = getContent(formFileName, True)
-    dictionary = getContent(dictFileName, True)["dict"]
-    suppDictionary = getContent(suppDictFileName, True)["dict"]
+    (formRes, dictionary) = getScanFormData(textName)
+
+    lines = filter(lambda line: isScannedLine(textName, line), lines)
+    return (lines, lemma, formRes, dictionary)
 
-    for key in suppDictionary:
-        dictionary[key] = suppDictionary[key]
+# get the form info (by form) and dictionary needed to scan the lines of a text
+def getScanFormData(textName):
+    formFileName = getTextFormDataFn(textName)
+    formData = getContent(formFileName, True)
+    dictionary = TextDictionary(textName, formData)
 
     formRes = {}
     for form in formData:
         key = form[0]
         val = form[1]
         formRes[key] = val
+    return (formRes, dictionary)
 
-
-    # certain sections of the Hymns are in couplets, so half the lines are hexameter.
-    lines2 = []
+# return whether the given line of a text is a hexameter that should be
+# scanned. Certain sections of the Hymns are in couplets, so half the lines
+# are hexameter.
+def isScannedLine(textName, line):
     if (textName == "CallimachusHymns"):
-        for line in lines:
-            if not(line["book"] == 5 and (line["line"] % 2 == 0)):
-                lines2.append(line)
-    else:
-        lines2 = lines
-    lines = lines2
-    return (lines, lemma, formRes, dictionary)
+        return not(line["book"] == 5 and (line["line"] % 2 == 0))
+    return True
 
 # get the scan data that should be produced for each line
 def getTargetScanData(textName):
@@ -1459,11 +1557,43 @@ def getFormAndLemmaData(tokenList, fromPerseus, formDataFn, lemmaDataFn):
         lemmaData = json.loads(lemmaDataContents)
 
     # reconstruct the form data dictionary (which is corrupted by the
-    # conversion to json and back)
-    formDataDict = {}
+    # conversion to json and back), restricted to the given tokens
+    return (FormDataView(getFormTable(formData), tokenList), lemmaData)
+
+# given form data as a list of [form, parses] pairs, return a dictionary from
+# each form to its parses
+def getFormTable(formData):
+    forms = {}
     for fi in formData:
-        form = fi[0]
-        formInfo = fi[1]
-        if (form in tokenList):
-            formDataDict[form] = formInfo
-    return (formDataDict, lemmaData)
+        forms[fi[0]] = fi[1]
+    return forms
+
+# the form data for a set of tokens: a view of a form table (from
+# getFormTable), which can be shared by many views, that only has the forms in
+# the set. It can be used as a dictionary from form to parses, but only
+# supports looking up forms.
+class FormDataView:
+    def __init__(self, forms, tokenList):
+        self.forms = forms
+        self.tokens = set(tokenList)
+
+    def __contains__(self, form):
+        return (form in self.tokens) and (form in self.forms)
+
+    def __getitem__(self, form):
+        if not(form in self.tokens):
+            raise KeyError(form)
+        return self.forms[form]
+
+# the form and lemma data of a text, loaded from the given files once so it can
+# be shared by every run over part of the text (e.g. each book), rather than
+# each run reading the files again. forms is the text's form table.
+class TextMorphology:
+    def __init__(self, formDataFn, lemmaDataFn):
+        self.forms = getFormTable(getContent(formDataFn, True))
+        self.lemmaData = getContent(lemmaDataFn, True)
+
+    # return the form data for the given set of (unique) tokens and the lemma
+    # data, as getFormAndLemmaData does
+    def getFormAndLemmaData(self, tokenList):
+        return (FormDataView(self.forms, tokenList), self.lemmaData)
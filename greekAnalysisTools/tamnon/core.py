@@ -20,10 +20,99 @@ DIALECT = generalUtils.DIALECT
 
 VERBOSE = False
 
+# the types of counts kept: Max counts a token if some parse of it has the
+# dialect (or combo); Min counts it if every parse does
+COUNT_TYPES = ["Max", "Min"]
+
+# counts of tokens by combination of dialects and by dialect, with a row for
+# each of COUNT_TYPES, kept in integer arrays. For a rule, possible holds the
+# number of tokens the rule could (Max) or must (Min) apply to.
+class DialectCounts:
+    def __init__(self, numCombos):
+        self.possible = np.zeros(len(COUNT_TYPES), dtype=np.int64)
+        self.combos = np.zeros((len(COUNT_TYPES), numCombos), dtype=np.int64)
+        self.dialects = np.zeros((len(COUNT_TYPES), generalUtils.NUM_DIALECTS), dtype=np.int64)
+
+    # add count tokens with the given combo and dialect results (each with a
+    # max and a min list, as from analyzeToken); possible holds the max and
+    # min number of tokens to add to possible for each of them
+    def add(self, comboResults, dialectResults, count, possible=(0, 0)):
+        self.possible += count*np.array(possible)
+        self.combos += count*np.array([comboResults["max"], comboResults["min"]])
+        self.dialects += count*np.array([dialectResults["max"], dialectResults["min"]])
+
+    # get the combo counts, in the layout of ComboFrequencies
+    def getComboFrequencies(self):
+        return dict(zip(COUNT_TYPES, self.combos.tolist()))
+
+    # get the dialect counts, in the layout of DialectFrequencies
+    def getDialectFrequencies(self):
+        return dict(zip(COUNT_TYPES, self.dialects.tolist()))
+
+    # get the counts for a rule, in the layout of the Occurrences of a rule
+    # result
+    def getOccurrences(self):
+        occurrences = {}
+        for t in range(len(COUNT_TYPES)):
+            occurrences[COUNT_TYPES[t]] = {
+                "Possible": int(self.possible[t]),
+                "ComboOutcomes": self.combos[t].tolist(),
+                "DialectOutcomes": self.dialects[t].tolist()
+            }
+        return occurrences
+
+# given a list of results, return the sum of the values getCounts picks out of
+# each one (lists with the same shape), as an array
+def sumCounts(results, getCounts):
+    return np.array(map(getCounts, results), dtype=np.int64).sum(axis=0)
+
+# given the list of rules, index them by the lemmas and parts of speech in
+# their triggers (see rules.py), so that each parse only has to be tested
+# against the rules that can give a verdict on it. Rules whose trigger has
+# no lemmas or parts of speech are under "Any".
+def getRuleIndex(rules):
+    ruleIndex = {"Lemmas": {}, "POS": {}, "Any": []}
+    for ruleNum in range(len(rules)):
+        trigger = rules[ruleNum].get("Trigger", {})
+        if not("Lemmas" in trigger or "POS" in trigger):
+            ruleIndex["Any"].append(ruleNum)
+        for lemma in trigger.get("Lemmas", []):
+            ruleIndex["Lemmas"].setdefault(lemma, []).append(ruleNum)
+        for pos in trigger.get("POS", []):
+            ruleIndex["POS"].setdefault(pos, []).append(ruleNum)
+    return ruleIndex
+
+# return true if the parse has all the features the rule's trigger requires
+def hasRequiredFeatures(rule, parse):
+    for feature in rule.get("Trigger", {}).get("Requires", []):
+        if not(feature in parse):
+            return False
+    return True
+
+# return true if the rule's trigger allows it to give a verdict on the parse
+def canTrigger(rule, parse):
+    trigger = rule.get("Trigger", {})
+    if ("Lemmas" in trigger or "POS" in trigger):
+        if not(parse["lemma"] in trigger.get("Lemmas", []) or parse.get("pos") in trigger.get("POS", [])):
+            return False
+    return hasRequiredFeatures(rule, parse)
+
+# given the rules and their index, return the set of the numbers of the rules
+# that can give a verdict on the parse
+def getParseRules(rules, ruleIndex, parse):
+    ruleNums = set(ruleIndex["Any"])
+    ruleNums.update(ruleIndex["Lemmas"].get(parse["lemma"], []))
+    ruleNums.update(ruleIndex["POS"].get(parse.get("pos"), []))
+    return set(filter(lambda ruleNum: hasRequiredFeatures(rules[ruleNum], parse), ruleNums))
+
 # given a token, information about the tokens parses, the list of rules,
 # the data for each lemma, and the number of possible dialect combos, and
 # whether we only need a short report
-def analyzeToken(token, tokenInfo, rules, evalResults, lemmaData, numCombos, shortReport):
+# count is the number of times the token appears in the text; the rule
+# decisions and evaluation results for the token count that many times.
+# ruleIndex is the index of the rules from getRuleIndex; if it is given, each
+# parse is only tested against the rules that can give a verdict on it.
+def analyzeToken(token, tokenInfo, rules, evalResults, lemmaData, numCombos, shortReport, count=1, ruleIndex=None):
     parseInfo = tokenInfo[0]
 
     result = {}
@@ -42,8 +131,16 @@ def analyzeToken(token, tokenInfo, rules, evalResults, lemmaData, numCombos, sho
     for i in range(len(parseInfo)):
         result["reasons"].append([])
 
+    # the rules to test each parse against
+    noVerdict = generalUtils.getNArray(generalUtils.NUM_DIALECTS, 0)
+    if (ruleIndex == None):
+        parseRules = [set(range(len(rules)))]*len(parseInfo)
+    else:
+        parseRules = map(lambda parse: getParseRules(rules, ruleIndex, parse), parseInfo)
+
     # for each rule
-    for rule in rules:
+    for ruleNum in range(len(rules)):
+        rule = rules[ruleNum]
         # testing function returns an array specifying whether the token
         # matches (or doesn't match) a series of dialects;
         tester = rule["Tester"]
@@ -54,6 +151,10 @@ def analyzeToken(token, tokenInfo, rules, evalResults, lemmaData, numCombos, sho
 
         # determine the dialect of each parse by this rule
         for i in range(len(parseInfo)):
+            if not(ruleNum in parseRules[i]):
+                # the tester would give no verdict on this parse
+                dialects = noVerdict
+                continue
             parse = parseInfo[i]
 
             info = [parse, lemmaData[parse["lemma"]]]
@@ -84,9 +185,9 @@ def analyzeToken(token, tokenInfo, rules, evalResults, lemmaData, numCombos, sho
 
             ruleRes["comboResults"] = {}
             # if any parse has this combo
-            ruleRes["comboResults"]["max"] = generalUtils.getNArray(numCombos, 0)
+            ruleRes["comboResults"]["max"] = [0]*numCombos
             # if every parse has this combo
-            ruleRes["comboResults"]["min"] = generalUtils.getNArray(numCombos, 0)
+            ruleRes["comboResults"]["min"] = [0]*numCombos
 
             ruleRes["dialectResults"] = {}
             # if any parse has this dialect as a yes
@@ -115,7 +216,7 @@ def analyzeToken(token, tokenInfo, rules, evalResults, lemmaData, numCombos, sho
                     ruleRes["dialectResults"]["max"][j] = 1
                 if dialectCount[j] == len(parseInfo):
                     ruleRes["dialectResults"]["min"][j] = 1
-            rule["ruleDecisions"].append([token, parseMatchInfo, ruleRes])
+            rule["ruleDecisions"].append([token, parseMatchInfo, ruleRes, count])
 
     numParses = len(parseInfo)
     result["parseResults"] = generalUtils.getNArray(numParses, 0)
@@ -199,28 +300,28 @@ def analyzeToken(token, tokenInfo, rules, evalResults, lemmaData, numCombos, sho
 
 
                 if (tamnonHas and morpheusHas):
-                    evalResults[j]["Both"]["Count"] += 1
+                    evalResults[j]["Both"]["Count"] += count
                     parse = copy.deepcopy(parseInfo[i])
                     parse["reasons"] = dialectReasons[j]
-                    evalResults[j]["Both"]["Parses"].append(parse)
+                    evalResults[j]["Both"]["Parses"].extend([parse]*count)
                 elif (tamnonHas):
-                    evalResults[j]["TOnly"]["Count"] += 1
+                    evalResults[j]["TOnly"]["Count"] += count
                     parse = copy.deepcopy(parseInfo[i])
                     parse["reasons"] = dialectReasons[j]
-                    evalResults[j]["TOnly"]["Parses"].append(parse)
+                    evalResults[j]["TOnly"]["Parses"].extend([parse]*count)
                 elif (morpheusHas):
-                    evalResults[j]["MOnly"]["Count"] += 1
+                    evalResults[j]["MOnly"]["Count"] += count
                     parse = copy.deepcopy(parseInfo[i])
                     parse["reasons"] = dialectReasons[j]
-                    evalResults[j]["MOnly"]["Parses"].append(parse)
+                    evalResults[j]["MOnly"]["Parses"].extend([parse]*count)
                 else:
-                    evalResults[j]["Neither"]["Count"] += 1
+                    evalResults[j]["Neither"]["Count"] += count
 
 
     # does this count as max (or min) for each combo?
     result["comboResults"] = {}
-    result["comboResults"]["max"] = generalUtils.getNArray(numCombos, 0)
-    result["comboResults"]["min"] = generalUtils.getNArray(numCombos, 0)
+    result["comboResults"]["max"] = [0]*numCombos
+    result["comboResults"]["min"] = [0]*numCombos
 
     uniqPossibleCombos = set(possibleCombos)
     for item in uniqPossibleCombos:
@@ -242,6 +343,14 @@ def analyzeToken(token, tokenInfo, rules, evalResults, lemmaData, numCombos, sho
     # return the information about the token.
     return result
 
+# get the form and lemma data for the given set of (unique) tokens, from the
+# given generalUtils.TextMorphology if there is one, or else as
+# generalUtils.getFormAndLemmaData does
+def getFormAndLemmaData(tokenList, fromPerseus, formFn, lemmaFn, morphology):
+    if (morphology == None):
+        return generalUtils.getFormAndLemmaData(tokenList, fromPerseus, formFn, lemmaFn)
+    return morphology.getFormAndLemmaData(tokenList)
+
 # given input text, rules, a filename containing information about each form, a
 # file containing information about each lemma, the list of graph filenames, and
 # whether to get data straight from Perseus' Morpheus, determine all the
@@ -249,25 +358,18 @@ def analyzeToken(token, tokenInfo, rules, evalResults, lemmaData, numCombos, sho
 # reports. If graphFns is non-empty, store the result graphs at the filenames
 # specified in graphFns.
 # shortReport means we are only looking for minimal information
-def generateResults(inputText, rules, formFn, lemmaFn, graphFns, fromPerseus, shortReport):
+# morphology, if given, is the generalUtils.TextMorphology already loaded for
+# the text, which is used instead of the form and lemma files
+def generateResults(inputText, rules, formFn, lemmaFn, graphFns, fromPerseus, shortReport, morphology=None):
     (standardizedTokens, sortedUniqTokens) = inputText
 
     # get the form and lemma info
-    (formData, lemmaData) = generalUtils.getFormAndLemmaData(sortedUniqTokens,
-      fromPerseus, formFn, lemmaFn)
+    (formData, lemmaData) = getFormAndLemmaData(sortedUniqTokens, fromPerseus,
+      formFn, lemmaFn, morphology)
 
     numCombos = pow(3, generalUtils.NUM_DIALECTS)
-    comboFrequencies = {}
-    # array for each combination of dialects (max)
-    comboFrequencies["Max"] = generalUtils.getNArray(numCombos, 0)
-    # array for each combination of dialects (min)
-    comboFrequencies["Min"] = generalUtils.getNArray(numCombos, 0)
-
-    dialectFrequencies = {}
-    # array for each dialect (max)
-    dialectFrequencies["Max"] = generalUtils.getNArray(generalUtils.NUM_DIALECTS, 0)
-    # array for each dialect (min)
-    dialectFrequencies["Min"] = generalUtils.getNArray(generalUtils.NUM_DIALECTS, 0)
+    # counts for each combination of dialects and each dialect (max and min)
+    frequencies = DialectCounts(numCombos)
 
     numValidTokens = 0
 
@@ -276,6 +378,7 @@ def generateResults(inputText, rules, formFn, lemmaFn, graphFns, fromPerseus, sh
     # set up way to store rule data
     for rule in rules:
         rule["ruleDecisions"] = []
+    ruleIndex = getRuleIndex(rules)
 
     # set up evaluation stuff
     evalResults = generalUtils.getNArray(generalUtils.NUM_DIALECTS, {})
@@ -297,61 +400,48 @@ def generateResults(inputText, rules, formFn, lemmaFn, graphFns, fromPerseus, sh
             "Count": 0
         }
 
-    # run the analysis on each token.
+    # the verdict for a token only depends on its parses, so each distinct
+    # token is analyzed once, and counted as many times as it appears.
+    tokenCounts = {}
     for token in standardizedTokens:
-        if (token in formData):
-            tokenInfo = [formData[token]]
-            # need to calculate count data, rule data, evaluation results, and
-            # individual token data
-            res = analyzeToken(token, tokenInfo, rules, evalResults, lemmaData, numCombos, shortReport)
-            tokenByToken.append(res)
-            if (res["valid"]):
-                numValidTokens += 1
-                for i in range(numCombos):
-                    comboFrequencies["Max"][i] += res["comboResults"]["max"][i]
-                    comboFrequencies["Min"][i] += res["comboResults"]["min"][i]
-                for i in range(generalUtils.NUM_DIALECTS):
-                    dialectFrequencies["Max"][i] += res["dialectResults"]["max"][i]
-                    dialectFrequencies["Min"][i] += res["dialectResults"]["min"][i]
-        else:
-            tokenByToken.append({"valid": False, "token": token})
+        tokenCounts[token] = tokenCounts.get(token, 0) + 1
+
+    # run the analysis on each distinct token, in the order they first appear
+    tokenAnalyses = {}
+    for token in standardizedTokens:
+        if not(token in tokenAnalyses):
+            count = tokenCounts[token]
+            if (token in formData):
+                tokenInfo = [formData[token]]
+                # need to calculate count data, rule data, evaluation results, and
+                # individual token data
+                res = analyzeToken(token, tokenInfo, rules, evalResults, lemmaData, numCombos, shortReport, count, ruleIndex)
+                if (res["valid"]):
+                    numValidTokens += count
+                    frequencies.add(res["comboResults"], res["dialectResults"], count)
+            else:
+                res = {"valid": False, "token": token}
+            tokenAnalyses[token] = res
+        tokenByToken.append(tokenAnalyses[token])
 
     ruleResults = []
     # generate the rules text as well as the information necessary for
     # the graphs of the rule results.
     for rule in rules:
 
-        maxPossible = 0
-        maxComboOutcomes = generalUtils.getNArray(numCombos, 0)
-        maxDialectOutcomes = generalUtils.getNArray(generalUtils.NUM_DIALECTS, 0)
-        minPossible = 0
-        minComboOutcomes = generalUtils.getNArray(numCombos, 0)
-        minDialectOutcomes = generalUtils.getNArray(generalUtils.NUM_DIALECTS, 0)
+        outcomes = DialectCounts(numCombos)
 
         ruleDecisions = rule["ruleDecisions"]
 
+        # each decision is for a distinct token, and counts once for each
+        # time the token appears
         for decision in ruleDecisions:
             res = decision[2]
-            maxPossible += res["maxPossible"]
-            minPossible += res["minPossible"]
-            for i in range(numCombos):
-                maxComboOutcomes[i] += res["comboResults"]["max"][i]
-                minComboOutcomes[i] += res["comboResults"]["min"][i]
-            for i in range(generalUtils.NUM_DIALECTS):
-                maxDialectOutcomes[i] += res["dialectResults"]["max"][i]
-                minDialectOutcomes[i] += res["dialectResults"]["min"][i]
-
+            count = decision[3]
+            outcomes.add(res["comboResults"], res["dialectResults"], count, (res["maxPossible"], res["minPossible"]))
 
         ruleResult = {}
-        ruleResult["Occurrences"] = {}
-        ruleResult["Occurrences"]["Max"] = {}
-        ruleResult["Occurrences"]["Min"] = {}
-        ruleResult["Occurrences"]["Max"]["Possible"] = maxPossible
-        ruleResult["Occurrences"]["Max"]["ComboOutcomes"] = maxComboOutcomes
-        ruleResult["Occurrences"]["Max"]["DialectOutcomes"] = maxDialectOutcomes
-        ruleResult["Occurrences"]["Min"]["Possible"] = minPossible
-        ruleResult["Occurrences"]["Min"]["ComboOutcomes"] = minComboOutcomes
-        ruleResult["Occurrences"]["Min"]["DialectOutcomes"] = minDialectOutcomes
+        ruleResult["Occurrences"] = outcomes.getOccurrences()
         ruleResult["Rule"] = {}
         ruleResult["Rule"]["Short_Name"] = rule["Short_Name"]
         ruleResult["Rule"]["ruleName"] = rule["ruleName"]
@@ -365,8 +455,8 @@ def generateResults(inputText, rules, formFn, lemmaFn, graphFns, fromPerseus, sh
     results["NumTokens"] = len(standardizedTokens)
     results["NumUniqueTokens"] = len(sortedUniqTokens)
     results["NumValidTokens"] = numValidTokens
-    results["ComboFrequencies"] = comboFrequencies
-    results["DialectFrequencies"] = dialectFrequencies
+    results["ComboFrequencies"] = frequencies.getComboFrequencies()
+    results["DialectFrequencies"] = frequencies.getDialectFrequencies()
     results["RuleResults"] = ruleResults
     if not(shortReport):
         results["TokenResults"] = tokenByToken
@@ -379,37 +469,26 @@ def generateResults(inputText, rules, formFn, lemmaFn, graphFns, fromPerseus, sh
 def unifyDividedByBook(results):
     unified = {}
 
-    numTokens = copy.deepcopy(results[0]["NumTokens"])
-    comboFrequencies = copy.deepcopy(results[0]["ComboFrequencies"])
-    dialectFrequencies = copy.deepcopy(results[0]["DialectFrequencies"])
-    ruleResults = copy.deepcopy(results[0]["RuleResults"])
-
-    numCombos = len(results[0]["ComboFrequencies"]["Max"])
-    types = ["Max", "Min"]
-
-    for i in range(1, len(results)):
-        myResult = results[i]
-        numTokens += myResult["NumTokens"]
-
-        for aType in types:
-            for k in range(numCombos):
-                comboFrequencies[aType][k] += results[i]["ComboFrequencies"][aType][k]
-            for k in range(generalUtils.NUM_DIALECTS):
-                dialectFrequencies[aType][k] += results[i]["DialectFrequencies"][aType][k]
+    # add up the counts of all the books at once
+    combos = sumCounts(results, lambda res: map(lambda aType: res["ComboFrequencies"][aType], COUNT_TYPES))
+    dialects = sumCounts(results, lambda res: map(lambda aType: res["DialectFrequencies"][aType], COUNT_TYPES))
+    comboFrequencies = dict(zip(COUNT_TYPES, combos.tolist()))
+    dialectFrequencies = dict(zip(COUNT_TYPES, dialects.tolist()))
 
-            rr = results[i]["RuleResults"]
-            for j in range(len(ruleResults)):
-                    myRRSub = ruleResults[j]["Occurrences"][aType]
-                    rrSub = rr[j]["Occurrences"][aType]
-                    myRRSub["Possible"] += rrSub["Possible"]
-
-                    for k in range(numCombos):
-                        myRRSub["ComboOutcomes"][k] += rrSub["ComboOutcomes"][k]
-                    for k in range(generalUtils.NUM_DIALECTS):
-                        myRRSub["DialectOutcomes"][k] += rrSub["DialectOutcomes"][k]
-
-
-    unified["NumTokens"] = numTokens
+    ruleResults = copy.deepcopy(results[0]["RuleResults"])
+    for aType in COUNT_TYPES:
+        # with a row for each book and a column for each rule
+        getOccurrences = lambda res: map(lambda rr: rr["Occurrences"][aType], res["RuleResults"])
+        possible = sumCounts(results, lambda res: map(lambda occ: occ["Possible"], getOccurrences(res)))
+        comboOutcomes = sumCounts(results, lambda res: map(lambda occ: occ["ComboOutcomes"], getOccurrences(res)))
+        dialectOutcomes = sumCounts(results, lambda res: map(lambda occ: occ["DialectOutcomes"], getOccurrences(res)))
+        for j in range(len(ruleResults)):
+            myRRSub = ruleResults[j]["Occurrences"][aType]
+            myRRSub["Possible"] = int(possible[j])
+            myRRSub["ComboOutcomes"] = comboOutcomes[j].tolist()
+            myRRSub["DialectOutcomes"] = dialectOutcomes[j].tolist()
+
+    unified["NumTokens"] = sum(map(lambda res: res["NumTokens"], results))
     unified["NumUniqueTokens"] = 0
     unified["NumValidTokens"] = 0
     unified["ComboFrequencies"] = comboFrequencies
@@ -422,15 +501,15 @@ def unifyDividedByBook(results):
 
 # given a unified set of features, set the uniqueTokens and validTokens
 # to their proper values
-def fixCombinedResults(results, lines, formDataFn, lemmaDataFn, fromPerseus):
+def fixCombinedResults(results, lines, formDataFn, lemmaDataFn, fromPerseus, morphology=None):
 
     textBlock = ""
     for item in lines:
         textBlock += item["text"]
 
     (standardizedTokens, sortedUniqTokens) = generalUtils.cleanAndFixBlock(textBlock)
-    (formData, lemmaData) = generalUtils.getFormAndLemmaData(sortedUniqTokens,
-      fromPerseus, formDataFn, lemmaDataFn)
+    (formData, lemmaData) = getFormAndLemmaData(sortedUniqTokens, fromPerseus,
+      formDataFn, lemmaDataFn, morphology)
 
     numValidTokens = 0
 
@@ -593,7 +672,11 @@ def getResultText(results):
         for tokenInfo in res["RuleDecisions"]:
             token = tokenInfo[0]
             notable_parses = tokenInfo[1]
-            ruleResults.append("%s%s:" % (tab, token))
+            count = tokenInfo[3]
+            if (count == 1):
+                ruleResults.append("%s%s:" % (tab, token))
+            else:
+                ruleResults.append("%s%s (%d occurrences):" % (tab, token, count))
             for parse in notable_parses:
                 s = "%s%sParse %d: %s. " % (tab, tab, parse[0], parse[1])
                 s += "Dialect: " + "[" + ", ".join(map(str, parse[2])) + "]"
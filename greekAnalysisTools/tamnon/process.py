@@ -65,6 +65,11 @@ def processText(textName, shortReport, divideByBook):
 
     # true if we want to print results from a pre-saved file
     resultsFromFile = False#True#
+    # the form and lemma data, loaded once and shared by each book
+    morphology = None
+    if not(fromPerseus):
+        morphology = generalUtils.TextMorphology(formDataFn, lemmaDataFn)
+
     if not(resultsFromFile):
 
         if (divideByBook):
@@ -84,7 +89,7 @@ def processText(textName, shortReport, divideByBook):
 
                 inputText = (standardizedTokens, sortedUniqTokens)
 
-                result = core.generateResults(inputText, tRules.rulesList, formDataFn, lemmaDataFn, graphFns, False, shortReport)
+                result = core.generateResults(inputText, tRules.rulesList, formDataFn, lemmaDataFn, graphFns, False, shortReport, morphology)
                 result["TextName"] = textName
                 result["SubName"] = name
                 results.append(result)
@@ -102,7 +107,7 @@ def processText(textName, shortReport, divideByBook):
             # generate the results for the given input text, rules list, form data and lemma
             # data files, and graph filenames, and telling the results generator to use the
             # given files and not go directly to Morpheus for parsing.
-            results = core.generateResults(inputText, tRules.rulesList, formDataFn, lemmaDataFn, graphFns, fromPerseus, shortReport)
+            results = core.generateResults(inputText, tRules.rulesList, formDataFn, lemmaDataFn, graphFns, fromPerseus, shortReport, morphology)
             results["TextName"] = textName
             results["SubName"] = "Overall"
             fullResults = results
@@ -124,7 +129,7 @@ def processText(textName, shortReport, divideByBook):
     else:
         outputResults = core.extractFeatures(results, divideByBook)
         if (divideByBook):
-            outputResults = core.fixCombinedResults(outputResults, inContents, formDataFn, lemmaDataFn, fromPerseus)
+            outputResults = core.fixCombinedResults(outputResults, inContents, formDataFn, lemmaDataFn, fromPerseus, morphology)
         else:
             outputResults = [outputResults]
 
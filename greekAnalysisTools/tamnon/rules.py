@@ -1300,9 +1300,17 @@ def Rule_NM_1(info):
 # list of rules. Each rule contains a function to test for that rule (defined
 # above), a rule name, a shorthand for the rule, and a list of forms that
 # the rule should categorize as Attic/Doric/Either.
+# Each rule also has a trigger, describing the parses the tester can give a
+# verdict on, so the other parses don't need to be tested:
+# "Lemmas" and "POS" - the tester only gives a verdict on parses with one of
+#     these lemmas or one of these parts of speech (any parse if neither is
+#     given)
+# "Requires" - the tester only gives a verdict on parses with all of these
+#     features
 
 rulesList = [
 {"Tester": Rule_SW_1, "ruleName": "SW.1: a(=s = e(/ws", "Short_Name": "SW.1",
+  "Trigger": {"Lemmas": ["e(/ws"]},
   "Test_Forms": {
     DIALECT.IONIC: [["e(/ws", -1]],
     DIALECT.AEOLIC: [["a(=s", -1], ["a(/s", -1]],
@@ -1311,6 +1319,7 @@ rulesList = [
   }
 },
 {"Tester": Rule_SW_2, "ruleName": "SW.2: -aos vs -ews", "Short_Name": "SW.2",
+  "Trigger": {"Lemmas": ["lao/s", "nao/s", "i)/laos"]},
   "Test_Forms": {
     DIALECT.IONIC: [["lew/s", -1], ["i(/lews", -1], ["new/s", -1], ["i(/lew|", -1], ["i(/lews", -1]],
     DIALECT.AEOLIC: [["laou=", -1], ["lao/s", -1], ["nao/s", -1], ["naou=", -1], ["i(/laos", -1], ["i(/laon", -1]],
@@ -1319,6 +1328,7 @@ rulesList = [
   }
 },
 {"Tester": Rule_SW_3, "ruleName": "SW.3: S/SS/TT variants", "Short_Name": "SW.3",
+  "Trigger": {"Lemmas": ["o(/sos", "o(po/sos", "me/sos"]},
   "Test_Forms": {
     DIALECT.IONIC: [["o(/sos", -1], ["o(/sou", -1], ["o(po/sos", -1], ["o(po/sw|", -1], ["me/sos", -1], ["me/son", -1]],
     DIALECT.AEOLIC: [["o(/ssos", -1], ["o(/ssou", -1], ["o(po/ssos", -1], ["o(po/ssw", -1], ["me/ssos", -1], ["me/sson", -1], ["o(/ttos", -1], ["o(po/ttos", -1]],
@@ -1327,6 +1337,7 @@ rulesList = [
   }
 },
 {"Tester": Rule_SW_4, "ruleName": "SW.4: Forms of the plural personal pronoun", "Short_Name": "SW.4",
+  "Trigger": {"Lemmas": ["e)gw/", "su/"], "Requires": ["number", "case"]},
   "Test_Forms": {
     DIALECT.IONIC: [["h(mei=s", -1], ["h(mi=n", -1], ["h(me/as", -1], ["h(ma=s", -1], ["u(mei=s", -1], ["u(mi=n", -1], ["u(me/as", -1], ["u(ma=s", -1]],
     DIALECT.AEOLIC: [["a)/mmes", -1], ["a)/mmin", -1], ["a)/mme", -1], ["u)/mmes", -1], ["u)/mmin", -1], ["u)/mme", -1], ["a)/mmi", -1], ["u)/mmi", -1]],
@@ -1335,6 +1346,7 @@ rulesList = [
   }
 },
 {"Tester": Rule_SW_5, "ruleName": "SW.5: The conjunction ei)", "Short_Name": "SW.5",
+  "Trigger": {"Lemmas": ["ei)", "ei)/qe", "ai)/qe"]},
   "Test_Forms": {
     DIALECT.IONIC: [["ei)", -1], ["ei)/qe", -1]],
     DIALECT.AEOLIC: [["ai)", -1], ["ai)/qe", -1]],
@@ -1343,6 +1355,7 @@ rulesList = [
   }
 },
 {"Tester": Rule_SW_6, "ruleName": "SW.6: The particle e)a_/n", "Short_Name": "SW.6",
+  "Trigger": {"Lemmas": ["e)a/n"]},
   "Test_Forms": {
     DIALECT.IONIC: [["h)/n", -1]],
     DIALECT.AEOLIC: [],
@@ -1351,6 +1364,7 @@ rulesList = [
   }
 },
 {"Tester": Rule_SW_7, "ruleName": "SW.7: The particle a)/n", "Short_Name": "SW.7",
+  "Trigger": {"Lemmas": ["a)/n"]},
   "Test_Forms": {
     DIALECT.IONIC: [["a)/n", -1]],
     DIALECT.AEOLIC: [["ka", -1], ["ke", -1]],
@@ -1359,6 +1373,7 @@ rulesList = [
   }
 },
 {"Tester": Rule_SW_8, "ruleName": "SW.8: a(/teros = e(/teros", "Short_Name": "SW.8",
+  "Trigger": {"Lemmas": ["a(/teros", "e(/teros"]},
   "Test_Forms": {
     DIALECT.IONIC: [["e(/teros", -1], ["e(/teron", -1]],
     DIALECT.AEOLIC: [["a(/teros", -1], ["a(/teron", -1]],
@@ -1367,6 +1382,7 @@ rulesList = [
   }
 },
 {"Tester": Rule_SW_9, "ruleName": "SW.9: de/komai = de/xomai", "Short_Name": "SW.9",
+  "Trigger": {"Lemmas": ["de/xomai"], "Requires": ["tense"]},
   "Test_Forms": {
     DIALECT.IONIC: [["de/xomai", -1], ["e)de/xeto", -1]],
     DIALECT.AEOLIC: [["de/komai", -1], ["e)de/keto", -1]],
@@ -1375,6 +1391,7 @@ rulesList = [
   }
 },
 {"Tester": Rule_SW_10, "ruleName": "SW.10: o)/numa = o)/nomai", "Short_Name": "SW.10",
+  "Trigger": {"Lemmas": ["o)/noma"]},
   "Test_Forms": {
     DIALECT.IONIC: [["o)/noma", -1], ["o)no/mata", -1]],
     DIALECT.AEOLIC: [["o)/numa", -1]] ,
@@ -1383,6 +1400,7 @@ rulesList = [
   }
 },
 {"Tester": Rule_SW_11, "ruleName": "SW.11: Forms of e)/nika", "Short_Name": "SW.11",
+  "Trigger": {"Lemmas": ["fe/rw"], "Requires": ["mood", "tense"]},
   "Test_Forms": {
     DIALECT.IONIC: [["e)/neika", -1], ["h)/neika", -1], ["h)/neikan", -1]],
     DIALECT.AEOLIC: [],
@@ -1391,6 +1409,7 @@ rulesList = [
   }
 },
 {"Tester": Rule_SW_12a, "ruleName": "SW.12a: Adverbs ending in -ou", "Short_Name": "SW.12a",
+  "Trigger": {"Lemmas": ["pou=", "o(/pou", "au)tou=", "o(mou=", "a(mou=", "dh/pou"]},
   "Test_Forms": {
     DIALECT.IONIC: [["pou=", -1], ["o(/pou", -1], ["au)tou=", -1], ["o(mou=", -1], ["a(mou=", -1], ["dh/pou", -1]],
     DIALECT.AEOLIC: [],
@@ -1399,6 +1418,7 @@ rulesList = [
   }
 },
 {"Tester": Rule_SW_12b, "ruleName": "SW.12b: Adverbs ending in -ei", "Short_Name": "SW.12b",
+  "Trigger": {"Lemmas": ["pei=2", "toutei/", "tau/th|", "thnei=", "e)kei=", "au)tei=", "au)tou="]},
   "Test_Forms": {
     DIALECT.IONIC: [["tau/th|", -1], ["e)kei=", -1], ["au)tou=", -1]],
     DIALECT.AEOLIC: [["pei=", -1], ["toutei/", -1], ["thnei=", -1], ["au)tei=", -1]],
@@ -1407,6 +1427,7 @@ rulesList = [
   }
 },
 {"Tester": Rule_SW_12c, "ruleName": "SW.12c: Adverbs ending in -qen", "Short_Name": "SW.12c",
+  "Trigger": {"Lemmas": ["e)/nqen", "e)/swqen", "o(/qen", "o(po/qen", "po/qen", "pro/sqen"]},
   "Test_Forms": {
     DIALECT.IONIC: [["e)/nqen", -1], ["e)/swqen", -1], ["o(/qen", -1], ["o(po/qen", -1], ["po/qen", -1], ["pro/sqen", -1]],
     DIALECT.AEOLIC: [["pro/sqa", -1]],
@@ -1415,6 +1436,7 @@ rulesList = [
   }
 },
 {"Tester": Rule_SW_12d, "ruleName": "SW.12d: Adverbs ending in -ka vs -te", "Short_Name": "SW.12d",
+  "Trigger": {"Lemmas": ["o(/te", "o(/te2", "to/te", "tote/", "tote/2", "pote/", "pote/2", "po/te", "o(po/te"]},
   "Test_Forms": {
     DIALECT.IONIC: [["to/te", -1], ["tote/", -1], ["po/te", -1], ["pote/", -1], ["o(po/te", -1]],
     DIALECT.AEOLIC: [["to/ka", -1], ["po/ka", -1], ["poka/", -1]],
@@ -1423,6 +1445,7 @@ rulesList = [
   }
 },
 {"Tester": Rule_SW_13, "ruleName": "SW.13: Ionic -ei- for attic -e-", "Short_Name": "SW.13",
+  "Trigger": {"Lemmas": ["ce/nos", "e)/natos", "e(/neka", "mo/nos", "ko/rh", "o(/ros", "o(/los", "ou)=los", "i)/sos", "deirh/", "ou)do/s"]},
   "Test_Forms": {
     DIALECT.IONIC: [["cei=nos", -1], ["cei=non", -1], ["ei)/natos", -1], ["ei)/naton", -1], ["ei(/neka", -1], ["mou=nos", -1], ["mou=non", -1], ["ou)=ros", -1], ["ou)=ron", -1], ["ou)=los", -1], ["i)=sos", -1], ["i)=son", -1], ["dei/rh", -1], ["deirh/n", -1], ["ou)do/s", -1], ["ou)do/n", -1]],
     DIALECT.AEOLIC: [["ce/nos", -1], ["ce/non", -1], ["e)/natos", -1], ["e)/naton", -1], ["e(/neka", -1], ["mo/nos", -1], ["mo/non", -1], ["o(/ros", -1], ["o(/ron", -1], ["o(/los", -1], ["o(/lou", -1], ["i)/sos", -1], ["i)/son", -1], ["de/ra", -1], ["de/ran", -1], ["o)do/s", -1], ["o)do/n", -1]],
@@ -1431,6 +1454,7 @@ rulesList = [
   }
 },
 {"Tester": Rule_SW_14, "ruleName": "SW.14: dei/lomai = bou/lomai", "Short_Name": "SW.14",
+  "Trigger": {"Lemmas": ["bou/lomai"]},
   "Test_Forms": {
     DIALECT.IONIC: [["bo/lomai", -1], ["bo/letai", -1]],
     DIALECT.AEOLIC: [],
@@ -1439,6 +1463,7 @@ rulesList = [
   }
 },
 {"Tester": Rule_SW_15, "ruleName": "SW.15: i(aro/s = i(ero/s", "Short_Name": "SW.15",
+  "Trigger": {"Lemmas": ["i(ero/s"]},
   "Test_Forms": {
     DIALECT.IONIC: [["i(ero/s", -1], ["i(erou=", -1], ["i(eroi/", -1], ["i(ro/s", -1], ["i(=ros", -1], ["i(rou=", -1]],
     DIALECT.AEOLIC: [["i(aro/s", -1], ["i(arou=", -1]],
@@ -1447,6 +1472,7 @@ rulesList = [
   }
 },
 {"Tester": Rule_SW_16, "ruleName": "SW.16: Forms of ekei=nos", "Short_Name": "SW.16",
+  "Trigger": {"Lemmas": ["e)kei=nos"]},
   "Test_Forms": {
     DIALECT.IONIC: [["kei=nos", -1], ["kei=non", -1]],
     DIALECT.AEOLIC: [["kh=nos", -1], ["kh=non", -1]],
@@ -1455,6 +1481,7 @@ rulesList = [
   }
 },
 {"Tester": Rule_SW_17, "ruleName": "SW.17: Forms of koinos", "Short_Name": "SW.17",
+  "Trigger": {"Lemmas": ["su/n", "cuno/s", "koino/s"]},
   "Test_Forms": {
     DIALECT.IONIC: [["su/n", -1], ["cuno/s", -1], ["cunou=", -1]],
     DIALECT.AEOLIC: [["su/n", -1], ["koino/s", -1], ["koinou=", -1]],
@@ -1463,6 +1490,7 @@ rulesList = [
   }
 },
 {"Tester": Rule_SW_18, "ruleName": "SW.18: Forms of kratero/s", "Short_Name": "SW.18",
+  "Trigger": {"Lemmas": ["kratero/s", "kartero/s"]},
   "Test_Forms": {
     DIALECT.IONIC: [["kartero/s", -1], ["karterou=", -1]],
     DIALECT.AEOLIC: [["kartero/s", -1], ["karterou=", -1]],
@@ -1471,6 +1499,7 @@ rulesList = [
   }
 },
 {"Tester": Rule_SW_19, "ruleName": "SW.19: Forms of dhmiourgo/s", "Short_Name": "SW.19",
+  "Trigger": {"Lemmas": ["dhmiourgo/s"]},
   "Test_Forms": {
     DIALECT.IONIC: [["dhmiorgo/s", -1]],
     DIALECT.AEOLIC: [],
@@ -1479,6 +1508,7 @@ rulesList = [
   }
 },
 {"Tester": Rule_SW_20, "ruleName": "SW.20: Forms of eu)qu/s", "Short_Name": "SW.20",
+  "Trigger": {"Lemmas": ["eu)qu/s"]},
   "Test_Forms": {
     DIALECT.IONIC: [["i)qu/s", -1], ["i)qei=a", -1]],
     DIALECT.AEOLIC: [["eu)qu/s", -1], ["eu)qei=a", -1]],
@@ -1487,6 +1517,7 @@ rulesList = [
   }
 },
 {"Tester": Rule_SW_21, "ruleName": "SW.21: Forms of mi/a", "Short_Name": "SW.21",
+  "Trigger": {"Lemmas": ["ei(=s"]},
   "Test_Forms": {
     DIALECT.IONIC: [["mi/a", -1], ["mia=s", -1]],
     DIALECT.AEOLIC: [["i)/a", -1], ["i)a/s", -1]],
@@ -1495,6 +1526,7 @@ rulesList = [
   }
 },
 {"Tester": Rule_SW_22, "ruleName": "SW.22: Homeric forms of gonu, doru, zeus, naus", "Short_Name": "SW.22",
+  "Trigger": {"Lemmas": ["go/nu", "do/ru", "*zeu/s", "nau=s"]},
   "Test_Forms": {
     DIALECT.IONIC: [],
     DIALECT.AEOLIC: [],
@@ -1503,6 +1535,7 @@ rulesList = [
   }
 },
 {"Tester": Rule_SW_23, "ruleName": "SW.23: Homeric forms of polus", "Short_Name": "SW.23",
+  "Trigger": {"Lemmas": ["polu/s"]},
   "Test_Forms": {
     DIALECT.IONIC: [],
     DIALECT.AEOLIC: [],
@@ -1511,6 +1544,7 @@ rulesList = [
   }
 },
 {"Tester": Rule_SW_24, "ruleName": "SW.24: Homeric ptolis", "Short_Name": "SW.24",
+  "Trigger": {"Lemmas": ["po/lis"]},
   "Test_Forms": {
     DIALECT.IONIC: [],
     DIALECT.AEOLIC: [],
@@ -1519,6 +1553,7 @@ rulesList = [
   }
 },
 {"Tester": Rule_NE_1a, "ruleName": "NE.1a: Endings of singular feminine long alpha-stems", "Short_Name": "NE.1a",
+  "Trigger": {"Lemmas": ["o(/s", "o(", "polu/s"], "POS": ["noun", "adj", "part"], "Requires": ["gender", "number"]},
   "Test_Forms": {
     DIALECT.IONIC: [["gnw/mh", -1], ["gnw/mhs", -1], ["gnw/mh|", -1], ["gnw/mhn", -1], ["paideuome/nh", -1], ["paideuome/nhs", -1], ["pepaideume/nh", -1], ["pepaideume/nhs", -1], ["h(=s", -1], ["h(/n", -1], ["a)gorh/n", -1], ["a)pria/thn", -1], ["au)dh/", -1], ["au)th/", -1], ["bi/hn", -1], ["boulh/", -1], ["canqh=s", -1], ["daimoni/h", -1], ["deciterh=|", -1], ["deinh/", -1], ["duwdeka/th", -1], ["e)i+/shs", -1], ["fa/nh", -1], ["fare/trhn", -1], ["fi/lh", -1], ["fqi/hn", -1], ["h)eri/h", -1], ["h)gaqe/h|", -1], ["i)/dh|", -1], ["kalh=|", -1], ["klaggh/", -1], ["klisi/hn", -1], ["kou/rhn", -1], ["kouridi/hs", -1], ["kradi/hn", -1], ["o)mi/xlh", -1], ["oi)/h", -1], ["au)dh/", 2], ["au)dh/", 3], ["i)/dh|", 5], ["oi)/h", 2]],
     DIALECT.AEOLIC: [["gnw/ma", -1], ["gnw/mas", -1], ["gnw/ma|", -1], ["gnw/man", -1], ["pepaideume/na", -1], ["pepaideume/nas", -1], ["a(=s", -1], ["a(/n", -1], ["a)ci/a", -1], ["do/menai", 2], ["polla/", 0]],
@@ -1527,6 +1562,7 @@ rulesList = [
   }
 },
 {"Tester": Rule_NE_1b, "ruleName": "NE.1b: Endings of singular feminine short alpha-stems", "Short_Name": "NE.1b",
+  "Trigger": {"POS": ["noun", "adj", "part"]},
   "Test_Forms": {
     DIALECT.IONIC: [["qala/tths", -1], ["qala/tth|", -1], ["paideuou/shs", -1], ["a)naidei/hn", -1], ["kni/shs", -1], ["kni/sh", -1], ["kni/sh|", -1], ["barei/hs", -1]],
     DIALECT.AEOLIC: [["qala/ssas", -1], ["qala/ssa|", -1], ["gefu/ras", -1], ["telhe/ssas", 1]],
@@ -1535,6 +1571,7 @@ rulesList = [
   }
 },
 {"Tester": Rule_NE_2, "ruleName": "NE.2: Singulars of masculine alpha stems", "Short_Name": "NE.2",
+  "Trigger": {"POS": ["noun"], "Requires": ["gender", "number", "case"]},
   "Test_Forms": {
     DIALECT.IONIC: [["poli/ths", -1], ["poli/tew", -1], ["poli/tw", -1], ["poli/thi", -1], ["poli/thn", -1], ["neani/hs", -1], ["ai)xmhth/n", -1], ["ba/thn", -1], ["i)/thn", -1], ["kradi/hn", 1]],
     DIALECT.AEOLIC: [["poli/tas", -1], ["poli/ta=", -1], ["poli=tai", -1], ["polita=n", -1], ["neani/as", -1]],
@@ -1543,6 +1580,7 @@ rulesList = [
   }
 },
 {"Tester": Rule_NE_3, "ruleName": "NE.3: Plurals of alpha stems", "Short_Name": "NE.3",
+  "Trigger": {"Lemmas": ["o(/s"], "POS": ["noun", "adj", "part"], "Requires": ["case", "number"]},
   "Test_Forms": {
     DIALECT.IONIC: [["politw=n", -1], ["a)gorw=n", -1], ["mhxanw=n", -1], ["r(htorikw=n", -1], ["qalassw=n", -1], ["moirw=n", -1], ["paideuome/nwn", -1], ["pepaideume/nwn", -1], ["w(=n", -1]],
     DIALECT.AEOLIC: [["polita=n", -1], ["a)gora=n", -1], ["maxana/n", -1], ["qa/lassan", -1], ["moira=n", -1], ["lipou=san", -1], ["a(=n", -1], ["ai)xmhta/wn", 0], ["baqei=an", 1]],
@@ -1551,6 +1589,7 @@ rulesList = [
   }
 },
 {"Tester": Rule_NE_4, "ruleName": "NE.4: Forms of digammma stems", "Short_Name": "NE.4",
+  "Trigger": {"POS": ["noun"], "Requires": ["case", "number"]},
   "Test_Forms": {
     DIALECT.IONIC: [["basile/os", -1], ["basilei=", -1], ["basile/a", -1], ["basilei=s", -1], ["basile/wn", -1], ["basile/as", -1]],
     DIALECT.AEOLIC: [["basilh=os", -1], ["basilh=i", -1], ["basilh=a", -1], ["basilei=s", -1], ["basile/wn", -1], ["basile/as", -1], ["ou)rei=s", -1]],
@@ -1559,6 +1598,7 @@ rulesList = [
   }
 },
 {"Tester": Rule_NE_5, "ruleName": "NE.5: forms of iota stems", "Short_Name": "NE.5",
+  "Trigger": {"POS": ["noun"], "Requires": ["case", "number"]},
   "Test_Forms": {
     DIALECT.IONIC: [["po/lews", -1], ["po/lei", -1], ["po/leis", -1], ["polei=s", -1], ["po/lewn", -1], ["po/lesi", -1]],
     DIALECT.AEOLIC: [["po/lios", -1], ["po/li", -1], ["po/lies", -1], ["poli/wn", -1], ["po/lisi", -1], ["poli/esi", -1], ["po/lis", -1]],
@@ -1567,6 +1607,7 @@ rulesList = [
   }
 },
 {"Tester": Rule_NE_6, "ruleName": "NE.6: Dative plural in -essi", "Short_Name": "NE.6",
+  "Trigger": {"Requires": ["case", "number"]},
   "Test_Forms": {
     DIALECT.IONIC: [],
     DIALECT.AEOLIC: [["po/dessi", -1]],
@@ -1575,6 +1616,7 @@ rulesList = [
   }
 },
 {"Tester": Rule_NE_7, "ruleName": "NE.7: Homeric second declension endings", "Short_Name": "NE.7",
+  "Trigger": {"Lemmas": ["o(/s", "o("], "POS": ["noun", "adj", "part"], "Requires": ["number", "case"]},
   "Test_Forms": {
     DIALECT.IONIC: [["lo/gou", -1], ["o(dou=", -1], ["lo/gois", -1], ["o(doi=s", -1]],
     DIALECT.AEOLIC: [["lo/gou", -1], ["o(dou=", -1], ["lo/gois", -1], ["o(doi=s", -1]],
@@ -1583,6 +1625,7 @@ rulesList = [
   }
 },
 {"Tester": Rule_VE_1, "ruleName": "VE.1: Ionic mi-verbs inflected like contracts", "Short_Name": "VE.1",
+  "Trigger": {"Lemmas": ["di/dwmi", "ti/qhmi", "i(/hmi"], "Requires": ["number", "person", "mood", "tense", "voice"]},
   "Test_Forms": {
     DIALECT.IONIC: [["i(ei=si", -1], ["didoi=s", -1], ["didoi=sqa", -1], ["didoi=", -1], ["didou=si", -1], ["didou=sin", -1], ["tiqei=", -1], ["tiqei=si", -1]],
     DIALECT.AEOLIC: [["i(a=si", -1], ["di/dws", -1], ["di/dwsi", -1], ["di/dwsin", -1], ["dido/asi", -1], ["dido/asin", -1], ["ti/qhsi", -1], ["tiqe/asi", -1]],
@@ -1591,6 +1634,7 @@ rulesList = [
   }
 },
 {"Tester": Rule_VE_2, "ruleName": "VE.2: Third person middle forms", "Short_Name": "VE.2",
+  "Trigger": {"Requires": ["number", "person", "mood", "tense", "voice"]},
   "Test_Forms": {
     DIALECT.IONIC: [["tiqe/atai", -1], ["beblh/atai", -1], ["puqoi/ato", 0], ["puqoi/ato", 1]], # , ["dune/atai", -1] (better mi verb grabbing?)
     DIALECT.AEOLIC: [["ti/qentai", -1], ["be/blhntai", -1], ["paideu/ointo", -1]],
@@ -1599,6 +1643,7 @@ rulesList = [
   }
 },
 {"Tester": Rule_VE_3, "ruleName": "VE.3: Alpha contract endings", "Short_Name": "VE.3",
+  "Trigger": {"POS": ["verb"], "Requires": ["mood", "tense", "voice"]},
   "Test_Forms": {
     DIALECT.IONIC: [["tima=|s", -1], ["tima=|", -1], ["tima=te", -1], ["tima=|", -1], ["tima=tai", -1], ["tima=sqe", -1], ["e)ti/mas", -1], ["e)ti/ma", -1], ["e)tima=te", -1], ["e)tima=to", -1], ["tima=n", -1], ["tima=sqai", -1], ["te/xna|", -1], ["e)texna=to", -1]],
     DIALECT.AEOLIC: [["timh=|s", -1], ["timh=|", -1], ["timh=|", -1], ["timhtai/", -1], ["timh=n", -1], ["te/xnh|", -1]],
@@ -1607,6 +1652,7 @@ rulesList = [
   }
 },
 {"Tester": Rule_VE_4, "ruleName": "VE.4: Athematic 3rd plural secondary ending", "Short_Name": "VE.4",
+  "Trigger": {"POS": ["verb"], "Requires": ["mood", "tense", "person", "number"]},
   "Test_Forms": {
     DIALECT.IONIC: [["e)/dosan", -1], ["i(/stasan", -1]],
     DIALECT.AEOLIC: [["e)/don", -1], ["i(/stan", -1]],
@@ -1615,6 +1661,7 @@ rulesList = [
   }
 },
 {"Tester": Rule_VE_5, "ruleName": "VE.5: Active infinitive endings (-men vs -nai vs -menai)", "Short_Name": "VE.5",
+  "Trigger": {"POS": ["verb"], "Requires": ["mood", "voice"]},
   "Test_Forms": {
     DIALECT.IONIC: [["dido/nai", -1], ["tiqe/nai", -1]],
     DIALECT.AEOLIC: [["dido/men", -1], ["ti/qemen", -1], ["dido/menai", -1]],
@@ -1623,6 +1670,7 @@ rulesList = [
   }
 },
 {"Tester": Rule_VE_6, "ruleName": "VE.6: Homeric verb endings", "Short_Name": "VE.6",
+  "Trigger": {"POS": ["verb"], "Requires": ["number", "person", "mood", "tense", "voice"]},
   "Test_Forms": {
     DIALECT.IONIC: [],
     DIALECT.AEOLIC: [],
@@ -1631,6 +1679,7 @@ rulesList = [
   }
 },
 {"Tester": Rule_NM_1, "ruleName": "NM.1: Nu Movable (simple)", "Short_Name": "NM.1",
+  "Trigger": {"POS": ["noun", "adj", "part", "verb"], "Requires": ["number"]},
   "Test_Forms": {
     DIALECT.IONIC: [["paideu/ousin", -1], ["po/lisin", -1], ["e)pai/deusen", -1], ["w)/moisin", -1], ["pe/mpousin", -1], ["proqe/ousin", 0], ["proqe/ousin", 2], ["proqe/ousin", 3], ["proqe/ousin", 5], ["w)/moisin", 0], ["w)/moisin", 1], ["w)/moisin", 3]],
     DIALECT.AEOLIC: [],
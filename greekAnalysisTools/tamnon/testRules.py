@@ -23,13 +23,7 @@ def getFormData(tokenList):
     lemmaInfoFile.close()
     lemmaInfo = json.loads(lemmaInfoContents)
 
-    formInfoDict = {}
-    for fi in formInfo:
-        form = fi[0]
-        parses = fi[1]
-        if (form in tokenList):
-            formInfoDict[form] = parses
-    return (formInfoDict, lemmaInfo)
+    return (generalUtils.FormDataView(generalUtils.getFormTable(formInfo), tokenList), lemmaInfo)
 
 # given a target dialect and a token result that failed to match that
 # target dialect, print an informative string;
@@ -100,12 +94,8 @@ def testToken(token, tokenInfo, lemmaInfo, index, tester, ruleName, targetDialec
             return (False, getFailureText(targetDialect, res, index))
     return (False, "%s: ERROR! NO MATCH AT ALL!\n" % (token))
 
-# test all of the rules
-def testRules():
-    # get the rules list
-    rulesList = tRules.rulesList
-
-    # get the list of unique tokens
+# get the sorted list of unique test tokens of the given rules
+def getTestTokens(rulesList):
     testTokensDuplicates = []
     for testRule in rulesList:
         for dialectIndex in testRule["Test_Forms"]:
@@ -113,7 +103,58 @@ def testRules():
             for item in dialectTests:
                 testTokensDuplicates.append(item[0])
 
-    testTokensList = sorted(set(testTokensDuplicates))
+    return sorted(set(testTokensDuplicates))
+
+# parses, beyond those of the test tokens, to check the triggers against, as
+# [parse, lemma info] pairs. These have features missing that Morpheus'
+# parses of the test tokens may always have.
+SYNTHETIC_TRIGGER_PARSES = [
+  # present infinitives have no person or number
+  [{"form": "tima=n", "lemma": "tima/w", "pos": "verb", "tense": "pres", "mood": "inf", "voice": "act"}, generalUtils.NO_TYPE],
+  [{"form": "timh=n", "lemma": "tima/w", "pos": "verb", "tense": "pres", "mood": "inf", "voice": "act"}, generalUtils.NO_TYPE],
+  [{"form": "tima=sqai", "lemma": "tima/w", "pos": "verb", "tense": "pres", "mood": "inf", "voice": "mp"}, generalUtils.NO_TYPE]
+]
+
+# check that the trigger of each rule is complete: every parse of the test
+# tokens (of all the rules), and every parse in SYNTHETIC_TRIGGER_PARSES, that
+# a rule gives a verdict on must be allowed by the rule's trigger, or core
+# would never test the rule on that parse.
+# Returns true if all the triggers are complete.
+def testTriggers(rulesList, testTokensList, formData, lemmaInfo):
+    # the parses to check, each with its lemma info and a description
+    checks = []
+    for token in testTokensList:
+        parses = formData[token]
+        for j in range(len(parses)):
+            parse = parses[j]
+            checks.append([parse, lemmaInfo[parse["lemma"]], "Token \"" + token + "\", parse " + str(j)])
+    for (parse, parseLemmaInfo) in SYNTHETIC_TRIGGER_PARSES:
+        checks.append([parse, parseLemmaInfo, "Synthetic parse \"" + parse["form"] + "\""])
+
+    allComplete = True
+    for i in range(len(rulesList)):
+        testRule = rulesList[i]
+        tester = testRule["Tester"]
+        printedRuleTitle = False
+        ruleTitle = "~~~~~~%d: TRIGGER: %s~~~~~~" % (i, testRule["ruleName"])
+        for (parse, parseLemmaInfo, description) in checks:
+            dialects = tester([parse, parseLemmaInfo])
+            hasVerdict = not(all(map(lambda d: d == 0, dialects)))
+            if (hasVerdict and not(core.canTrigger(testRule, parse))):
+                if not(printedRuleTitle):
+                    printedRuleTitle = True
+                    print ruleTitle
+                allComplete = False
+                print description + " (lemma " + parse["lemma"] + "), is not covered by the trigger."
+    return allComplete
+
+# test all of the rules
+def testRules():
+    # get the rules list
+    rulesList = tRules.rulesList
+
+    # get the list of unique tokens
+    testTokensList = getTestTokens(rulesList)
 
     # get the form and lemma info from the tokens.
     (formData, lemmaInfo) = getFormData(testTokensList)
@@ -147,5 +188,10 @@ def testRules():
                     allPassed = False
                     print "  ~~~" + generalUtils.getDialectName(dialectIndex) + ":~~~"
                     print txt
+
+    # check that the triggers don't leave out any of the test parses
+    if not(testTriggers(rulesList, testTokensList, formData, lemmaInfo)):
+        allPassed = False
+
     if (allPassed):
         print "All Tests Passed! :)"
@@ -17,6 +17,7 @@ from greekAnalysisTools.shared.preprocess import preprocessText, combineTexts
 from greekAnalysisTools.shared.postprocess import cleanAndCombineFeatures
 from greekAnalysisTools.shared.getResults import resultsPipeline
 import greekAnalysisTools.odikon.process as odikon
+import greekAnalysisTools.odikon.server as odikonServer
 from greekAnalysisTools.odikon.utils import APPROACH
 import greekAnalysisTools.tamnon.process as tamnon
 from greekAnalysisTools.tamnon.getTestForms import getTestForms as tamnonGetTestForms
@@ -455,6 +456,17 @@ scanOnly = False#True#
 #scanApproach = APPROACH.STUDENT
 #scanApproach = APPROACH.NATIVE_SPEAKER
 scanApproach = APPROACH.FALLBACK
+# number of processes to scan each text with (1 scans in this process; the
+# number of cores is a good choice for scanning in parallel)
+scanProcesses = 1
+# scan the easier passes of all the lines at once
+scanInBatches = False#True#
+# only scan each distinct line once (Homer repeats many lines verbatim)
+scanDedup = False#True#
+# save stage timings and pass counts for each scanned text
+scanProfile = False#True#
+# reuse the stored scans of lines whose inputs haven't changed since last run
+scanCache = False#True#
 
 # dialect analyze the text
 dialect = True#False#
@@ -545,7 +557,7 @@ if (preWork or scan or dialect):
                 print "  dialect analysis done."
 
             if (scan):
-                results, numLines, numSuccesses = odikon.processText(textName, scanApproach, True)
+                results, numLines, numSuccesses = odikon.processText(textName, scanApproach, True, scanProcesses, scanInBatches, scanDedup, scanProfile, scanCache)
                 if not(skipForAccuracy):
                     totalLines += numLines
                     totalSuccesses += numSuccesses
@@ -600,3 +612,10 @@ compareApproaches = False
 if (compareApproaches):
     textName = "Odyssey1"
     odikon.compareApproaches(textName)
+
+# this runs a local server that scans lines of the texts on request, keeping
+# each text's data loaded between requests (see odikon/server.py). It runs
+# until interrupted.
+runScanServer = False
+if (runScanServer):
+    odikonServer.runScanServer()